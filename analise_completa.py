@@ -23,95 +23,2642 @@ coletaremos os top-1.000 repositórios Java mais populares do GitHub, calculando
 uma das métricas definidas na Seção 3.
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import spearmanr, pearsonr
 import os
+import bisect
+import copy
+import csv
+import hashlib
+import heapq
+import html
+import importlib.util
+import json
+import cProfile
+import contextlib
 import random
-import requests
+import sqlite3
+import zlib
+import itertools
+import mmap
+import queue
+import re
+import tempfile
+import textwrap
+import threading
 import time
-from datetime import datetime
+import warnings
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 import subprocess
 import shutil
+import sys
 from pathlib import Path
 
-class AnalisadorQualidadeJava:
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage, a instrumentação mede só o tempo de CPU do próprio processo
+    resource = None
+from urllib.parse import quote, unquote, urlencode
+
+# A busca do GitHub nunca retorna mais do que 1.000 resultados por consulta
+LIMITE_RESULTADOS_BUSCA = 1000
+INICIO_GITHUB = date(2008, 1, 1)
+# Partes por divisão de shard quando o planejamento para em max_repos
+PARTES_POR_DIVISAO = 4
+
+
+class JanelaRateLimit:
+    """
+    Estado de rate limit de um recurso da API (core, search, graphql...), que o GitHub
+    contabiliza separadamente e identifica pelo cabeçalho X-RateLimit-Resource
+    """
+    __slots__ = ('restantes', 'reset_em', 'bloqueado_ate', 'consumo', 'aguardando')
+
+    def __init__(self):
+        self.restantes = None
+        self.reset_em = 0.0
+        self.bloqueado_ate = 0.0
+        # Requisições de cada estudo na janela atual e requisições de cada estudo aguardando
+        self.consumo = {}
+        self.aguardando = {}
+
+
+class ControladorRateLimit:
+    """
+    Agenda as requisições à API do GitHub a partir dos cabeçalhos de rate limit
+    (X-RateLimit-Remaining, X-RateLimit-Reset e Retry-After) em vez de pausas fixas, com uma
+    janela separada por recurso (a busca, o GraphQL e o REST têm cotas independentes).
+    É thread-safe e pode ser compartilhado por várias threads de coleta e por vários estudos:
+    com mais de um estudo ativo, cada um usa no máximo uma fração igual da janela de rate limit
+    (até que a janela vire ou outro estudo seja encerrado), e entre as requisições aguardando
+    que ainda cabem na fração do seu estudo a vez é do estudo com menos requisições na janela.
+    """
+
+    def __init__(self, reserva=0):
+        self.reserva = reserva
+        self.janelas = {}
+        self.tempo_espera_total = 0.0
+        # Total de requisições por estudo, para o relatório do lote
+        self.consumo = {}
+        self.ativos = set()
+        self._lock = threading.Lock()
+        self._condicao = threading.Condition(self._lock)
+
+    def janela(self, recurso="core"):
+        """
+        Retorna (criando se preciso) o estado de rate limit do recurso
+        """
+        if recurso not in self.janelas:
+            self.janelas[recurso] = JanelaRateLimit()
+        return self.janelas[recurso]
+
+    def aguardar(self, estudo=None, recurso="core"):
+        """
+        Bloqueia até que exista cota disponível no recurso e reserva uma requisição para o estudo
+        """
+        with self._condicao:
+            janela = self.janela(recurso)
+            self.ativos.add(estudo)
+            janela.aguardando[estudo] = janela.aguardando.get(estudo, 0) + 1
+            try:
+                while True:
+                    agora = time.time()
+                    if janela.bloqueado_ate > agora:
+                        espera = janela.bloqueado_ate - agora
+                    elif (janela.restantes is not None and janela.restantes <= self.reserva
+                          and janela.reset_em > agora):
+                        espera = janela.reset_em - agora
+                    elif not self._dentro_da_cota(janela, estudo, agora):
+                        espera = janela.reset_em - agora
+                    elif janela.consumo.get(estudo, 0) > min(
+                            janela.consumo.get(outro, 0) for outro in janela.aguardando
+                            if self._dentro_da_cota(janela, outro, agora)):
+                        # Vez de um estudo com menos requisições na janela e que ainda tem cota;
+                        # estudos que esgotaram a sua fração não bloqueiam os demais
+                        self._condicao.wait()
+                        continue
+                    else:
+                        if janela.restantes is not None:
+                            janela.restantes -= 1
+                        self.consumo[estudo] = self.consumo.get(estudo, 0) + 1
+                        janela.consumo[estudo] = janela.consumo.get(estudo, 0) + 1
+                        return
+                    self._condicao.wait(espera)
+                    self.tempo_espera_total += time.time() - agora
+            finally:
+                janela.aguardando[estudo] -= 1
+                if not janela.aguardando[estudo]:
+                    del janela.aguardando[estudo]
+                self._condicao.notify_all()
+
+    def _dentro_da_cota(self, janela, estudo, agora):
+        if janela.restantes is None or len(self.ativos) < 2 or janela.reset_em <= agora:
+            return True
+        orcamento = sum(janela.consumo.values()) + janela.restantes - self.reserva
+        return janela.consumo.get(estudo, 0) < orcamento / len(self.ativos)
+
+    def registrar(self, *estudos):
+        """
+        Inclui os estudos na divisão da cota antes da primeira requisição, para que o estudo
+        que começa primeiro não use a janela inteira enquanto os demais ainda não pediram nada
+        """
+        with self._condicao:
+            self.ativos.update(estudos)
+            self._condicao.notify_all()
+
+    def encerrar(self, estudo):
+        """
+        Retira o estudo da divisão da cota, liberando a sua fração para os demais
+        """
+        with self._condicao:
+            self.ativos.discard(estudo)
+            self._condicao.notify_all()
+
+    def atualizar(self, response, recurso="core"):
+        """
+        Atualiza a cota do recurso a partir dos cabeçalhos da resposta (X-RateLimit-Resource,
+        quando presente, prevalece sobre o recurso informado).
+        Retorna True quando a requisição foi barrada pelo rate limit e deve ser repetida.
+        """
+        headers = response.headers
+        agora = time.time()
+        with self._condicao:
+            self._condicao.notify_all()
+            janela = self.janela(headers.get('X-RateLimit-Resource', recurso))
+            if 'X-RateLimit-Remaining' in headers:
+                janela.restantes = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                reset_em = float(headers['X-RateLimit-Reset'])
+                if reset_em > janela.reset_em:
+                    # Nova janela de rate limit: a divisão da cota recomeça
+                    janela.consumo.clear()
+                janela.reset_em = reset_em
+
+            if response.status_code not in (403, 429):
+                return False
+
+            if 'Retry-After' in headers:
+                janela.bloqueado_ate = max(janela.bloqueado_ate, agora + float(headers['Retry-After']))
+                return True
+            if janela.restantes == 0:
+                janela.bloqueado_ate = max(janela.bloqueado_ate, janela.reset_em)
+                return True
+        return False
+
+
+class CacheRespostasHTTP:
+    """
+    Cache persistente (SQLite) das respostas da API do GitHub.
+    Entradas dentro do TTL são servidas sem requisição; entradas vencidas são revalidadas
+    com If-None-Match (respostas 304 não consomem a cota). Quando o cache passa de max_bytes,
+    as entradas acessadas há mais tempo são removidas.
+    """
+
+    def __init__(self, caminho="cache/respostas_github.sqlite", ttl=24 * 3600, max_bytes=256 * 1024 * 1024):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                etag TEXT,
+                corpo BLOB NOT NULL,
+                armazenado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL,
+                tamanho INTEGER NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def chave(url, params=None):
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def obter(self, chave):
+        """
+        Retorna (etag, dados, fresco) ou None quando a chave não está no cache
+        """
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT etag, corpo, armazenado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                return None
+            self._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+            self._conn.commit()
+        etag, corpo, armazenado_em = linha
+        fresco = time.time() - armazenado_em < self.ttl
+        return etag, json.loads(zlib.decompress(corpo)), fresco
+
+    def salvar(self, chave, etag, dados):
+        corpo = zlib.compress(json.dumps(dados).encode("utf-8"))
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, etag, corpo, agora, agora, len(corpo))
+            )
+            self._despejar()
+            self._conn.commit()
+
+    def renovar(self, chave):
+        """
+        Marca uma entrada revalidada (HTTP 304) como fresca novamente
+        """
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE respostas SET armazenado_em = ?, acessado_em = ? WHERE chave = ?", (agora, agora, chave)
+            )
+            self._conn.commit()
+
+    def _despejar(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for chave, tamanho in self._conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acessado_em"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            total -= tamanho
+
+
+class Instrumentacao:
+    """
+    Mede cada etapa do pipeline e cada repositório: tempo de parede, tempo de CPU (do processo
+    e dos subprocessos), bytes baixados, tempo de espera pelo rate limit e pico de RSS.
+    Como vários repositórios são processados ao mesmo tempo, as medições por repositório não
+    usam os contadores do processo: o tempo de CPU é o da thread mais o dos subprocessos e
+    workers do próprio repositório (campo 'cpu_subprocessos_s'), e bytes e pico de RSS são os
+    informados pela etapa; a espera pelo rate limit fica só nas etapas gerais.
+    Cada medição é gravada como uma linha JSON; resumo() imprime a tabela agregada por etapa.
+    Etapas listadas em perfilar (ou "todas") são perfiladas com pyinstrument, se instalado,
+    ou cProfile, e os perfis são gravados em <dir_perfis>/<etapa>.*. Só um perfil fica ativo
+    por vez (o Python 3.12+ não aceita dois profilers simultâneos): uma etapa aninhada em
+    outra já perfilada, inclusive em outra thread, entra no perfil da etapa externa.
+    """
+
+    def __init__(self, caminho="resultados/instrumentacao.jsonl", perfilar=None, fonte_espera=None,
+                 dir_perfis="resultados/perfis"):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.caminho = caminho
+        self.perfilar = set(perfilar or ())
+        self.dir_perfis = Path(dir_perfis)
+        self.fonte_espera = fonte_espera or (lambda: 0.0)
+        self.execucao = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.bytes_baixados = 0
+        self.registros = []
+        self._lock = threading.Lock()
+        self._perfilando = False
+
+    def registrar_bytes(self, quantidade):
+        with self._lock:
+            self.bytes_baixados += quantidade
+
+    @staticmethod
+    def _cpu():
+        if resource is None:
+            return time.process_time()
+        proprio = resource.getrusage(resource.RUSAGE_SELF)
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return proprio.ru_utime + proprio.ru_stime + filhos.ru_utime + filhos.ru_stime
+
+    @contextlib.contextmanager
+    def _perfil(self, nome):
+        if nome not in self.perfilar and "todas" not in self.perfilar:
+            yield
+            return
+        with self._lock:
+            externa = not self._perfilando
+            self._perfilando = True
+        if not externa:
+            yield
+            return
+        try:
+            with self._perfil_externo(nome):
+                yield
+        finally:
+            with self._lock:
+                self._perfilando = False
+
+    @contextlib.contextmanager
+    def _perfil_externo(self, nome):
+        self.dir_perfis.mkdir(parents=True, exist_ok=True)
+        if importlib.util.find_spec("pyinstrument") is not None:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                (self.dir_perfis / f"{nome}.html").write_text(profiler.output_html(), encoding="utf-8")
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(str(self.dir_perfis / f"{nome}.prof"))
+
+    @contextlib.contextmanager
+    def etapa(self, nome, repo=None):
+        """
+        Mede o bloco como uma etapa (ou, com repo, como a etapa de um repositório).
+        O dict retornado aceita campos extras, como 'bytes' de um clone.
+        """
+        registro = {}
+        inicio = time.time()
+        parede = time.perf_counter()
+        cpu = self._cpu() if repo is None else time.thread_time()
+        bytes_inicio = self.bytes_baixados
+        espera_inicio = self.fonte_espera()
+        try:
+            with self._perfil(nome) if repo is None else contextlib.nullcontext():
+                yield registro
+        finally:
+            if repo is None:
+                medicoes = {
+                    'cpu_s': round(self._cpu() - cpu, 4),
+                    'bytes': registro.get('bytes', self.bytes_baixados - bytes_inicio),
+                    'espera_rate_limit_s': round(self.fonte_espera() - espera_inicio, 3),
+                    'pico_rss_mb': (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+                                    if resource is not None else None),
+                }
+            else:
+                medicoes = {
+                    'cpu_s': round(time.thread_time() - cpu + registro.pop('cpu_subprocessos_s', 0.0), 4),
+                    'bytes': registro.get('bytes'),
+                    'espera_rate_limit_s': None,
+                    'pico_rss_mb': registro.pop('pico_rss_subprocessos_mb', None),
+                }
+            registro.update({
+                'execucao': self.execucao,
+                'etapa': nome,
+                'repo': repo,
+                'inicio': round(inicio, 3),
+                'parede_s': round(time.perf_counter() - parede, 4),
+                **medicoes,
+            })
+            with self._lock:
+                self.registros.append(registro)
+                with open(self.caminho, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(registro) + "\n")
+
+    def resumo(self):
+        """
+        Imprime a tabela de tempos por etapa da execução atual
+        """
+        agregados = {}
+        for registro in self.registros:
+            chave = registro['etapa'] if registro['repo'] is None else f"{registro['etapa']} (por repo)"
+            total = agregados.setdefault(chave, {'n': 0, 'parede_s': 0.0, 'cpu_s': 0.0, 'bytes': 0,
+                                                 'espera_rate_limit_s': 0.0, 'pico_rss_mb': 0.0})
+            total['n'] += 1
+            for campo in ('parede_s', 'cpu_s', 'bytes', 'espera_rate_limit_s'):
+                total[campo] += registro[campo] or 0
+            total['pico_rss_mb'] = max(total['pico_rss_mb'], registro['pico_rss_mb'] or 0)
+        
+        print("\n⏱️  TEMPOS POR ETAPA")
+        print(f"{'etapa':<28}{'n':>6}{'parede (s)':>12}{'cpu (s)':>10}{'MB baixados':>13}"
+              f"{'rate limit (s)':>16}{'pico RSS (MB)':>15}")
+        for nome, total in agregados.items():
+            print(f"{nome:<28}{total['n']:>6}{total['parede_s']:>12.2f}{total['cpu_s']:>10.2f}"
+                  f"{total['bytes'] / 1e6:>13.2f}{total['espera_rate_limit_s']:>16.2f}{total['pico_rss_mb']:>15.1f}")
+        return agregados
+
+
+def executar_subprocesso(comando, timeout=None, registro=None, **kwargs):
+    """
+    Equivalente a subprocess.run(comando, check=True, capture_output=True), mas colhe o processo
+    com os.wait4 para somar em registro o tempo de CPU ('cpu_subprocessos_s') e o pico de RSS
+    ('pico_rss_subprocessos_mb') do próprio subprocesso e dos descendentes que ele esperou,
+    sem misturar os de outras threads. Sem os.wait4 (Windows), o processo é apenas esperado.
+    """
+    estourou = threading.Event()
+    with tempfile.TemporaryFile() as saida, tempfile.TemporaryFile() as erros:
+        processo = subprocess.Popen(comando, stdout=saida, stderr=erros, **kwargs)
+        
+        def matar():
+            estourou.set()
+            processo.kill()
+        
+        temporizador = threading.Timer(timeout, matar) if timeout else None
+        if temporizador:
+            temporizador.start()
+        try:
+            if hasattr(os, "wait4"):
+                _, status, uso = os.wait4(processo.pid, 0)
+                processo.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                processo.wait()
+                uso = None
+        except BaseException:
+            processo.kill()
+            processo.wait()
+            raise
+        finally:
+            if temporizador:
+                temporizador.cancel()
+        saida.seek(0)
+        erros.seek(0)
+        stdout, stderr = saida.read(), erros.read()
+    
+    if registro is not None and uso is not None:
+        registro['cpu_subprocessos_s'] = registro.get('cpu_subprocessos_s', 0.0) + uso.ru_utime + uso.ru_stime
+        registro['pico_rss_subprocessos_mb'] = max(registro.get('pico_rss_subprocessos_mb') or 0.0,
+                                                   round(uso.ru_maxrss / 1024, 1))
+    if estourou.is_set():
+        raise subprocess.TimeoutExpired(comando, timeout, stdout, stderr)
+    if processo.returncode:
+        raise subprocess.CalledProcessError(processo.returncode, comando, stdout, stderr)
+    return subprocess.CompletedProcess(comando, processo.returncode, stdout, stderr)
+
+
+def tamanho_diretorio(caminho):
+    """
+    Soma o tamanho em bytes dos arquivos sob caminho
+    """
+    return sum(arquivo.stat().st_size for arquivo in Path(caminho).rglob("*") if arquivo.is_file())
+
+
+# Colunas do class.csv do CK usadas para cada métrica do dataset
+COLUNAS_CK = {
+    'cbo': 'cbo',
+    'dit': 'dit',
+    'lcom': 'lcom',
+    'wmc': 'wmc',
+    'rfc': 'rfc',
+    'lcom3': 'lcom*',
+    'ca': 'fanin',
+    'ce': 'fanout',
+    'npm': 'publicMethodsQty',
+}
+
+
+def pyarrow_disponivel():
+    """
+    Indica se o pyarrow (dependência opcional, usada para o Parquet por classe) está instalado
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def particao_repositorio(dir_classes, full_name):
+    """
+    Diretório da partição (estilo hive, repo=<full_name codificado>) de um repositório
+    """
+    return Path(dir_classes) / f"repo={quote(full_name, safe='')}"
+
+
+def _agregar_colunas(colunas, total_classes):
+    """
+    Agrega arrays de métricas por classe em mediana, média e p90 por métrica
+    """
+    import numpy as np
+    
+    agregados = {'classes': total_classes}
+    for metrica, valores in colunas.items():
+        array = np.asarray(valores, dtype=float)
+        array = array[np.isfinite(array)]
+        if array.size == 0:
+            agregados[metrica] = agregados[f'{metrica}_media'] = agregados[f'{metrica}_p90'] = np.nan
+            continue
+        agregados[metrica] = float(np.median(array))
+        agregados[f'{metrica}_media'] = float(array.mean())
+        agregados[f'{metrica}_p90'] = float(np.percentile(array, 90))
+    return agregados
+
+
+def _colunas_tabela_arrow(tabela):
+    """
+    Extrai as colunas de métricas de uma tabela Arrow como arrays NumPy
+    """
+    import numpy as np
+    import pyarrow.compute as pc
+    
+    colunas = {}
+    for metrica, coluna in COLUNAS_CK.items():
+        if coluna in tabela.column_names:
+            colunas[metrica] = pc.cast(tabela.column(coluna), "float64").to_numpy(zero_copy_only=False)
+        else:
+            colunas[metrica] = np.empty(0)
+    return colunas
+
+
+def agregar_class_csv(caminho_csv, destino_parquet=None):
+    """
+    Agrega o class.csv gerado pelo CK em mediana, média e p90 por métrica.
+    Com destino_parquet, as linhas por classe também são gravadas em Parquet nesse diretório.
+    Executada em processos separados pelo PipelineCK.
+    """
+    if destino_parquet is not None:
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+        
+        tabela = pacsv.read_csv(caminho_csv, convert_options=pacsv.ConvertOptions(
+            null_values=["", "NaN", "null"], strings_can_be_null=True
+        ))
+        Path(destino_parquet).mkdir(parents=True, exist_ok=True)
+        pq.write_table(tabela, Path(destino_parquet) / "classes.parquet", compression="zstd")
+        return _agregar_colunas(_colunas_tabela_arrow(tabela), tabela.num_rows)
+    
+    valores = {metrica: [] for metrica in COLUNAS_CK}
+    total_classes = 0
+    with open(caminho_csv, newline="", encoding="utf-8", errors="replace") as f:
+        for linha in csv.DictReader(f):
+            total_classes += 1
+            for metrica, coluna in COLUNAS_CK.items():
+                try:
+                    valores[metrica].append(float(linha[coluna]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+    return _agregar_colunas(valores, total_classes)
+
+
+def iterar_agregados_parquet(dir_classes):
+    """
+    Percorre as partições por repositório do Parquet de classes, uma de cada vez, lendo apenas
+    as colunas de métricas por memory-map. Gera (full_name, agregados); o pico de memória
+    depende do maior repositório, não do tamanho do corpus.
+    """
+    import pyarrow.parquet as pq
+    
+    colunas = sorted(set(COLUNAS_CK.values()))
+    for particao in sorted(Path(dir_classes).glob("repo=*")):
+        full_name = unquote(particao.name.split("=", 1)[1])
+        for arquivo in sorted(particao.glob("*.parquet")):
+            presentes = [c for c in colunas if c in pq.read_schema(arquivo, memory_map=True).names]
+            tabela = pq.read_table(arquivo, columns=presentes, memory_map=True)
+            yield full_name, _agregar_colunas(_colunas_tabela_arrow(tabela), tabela.num_rows)
+            del tabela
+
+
+# Tokens que mudam o estado da contagem de linhas Java: text blocks, literais de string e de
+# caractere (inclusive não terminados, até o fim da linha) e inícios de comentário
+_TOKENS_JAVA = re.compile(rb'"""|"(?:\\.|[^"\\])*"?|\'(?:\\.|[^\'\\])*\'?|//|/\*')
+
+
+def contar_linhas_arquivo_java(caminho):
+    """
+    Classifica as linhas de um arquivo Java em código, comentário e brancas em uma única
+    passagem. Trata comentários de bloco em várias linhas, comentários dentro de strings e
+    text blocks. Linhas com código e comentário contam como código.
+    Retorna (codigo, comentarios, brancas).
+    """
+    codigo = comentarios = brancas = 0
+    em_bloco = em_text_block = False
+    
+    with open(caminho, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0, 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+            for linha in iter(dados.readline, b""):
+                linha = linha.strip()
+                if not linha:
+                    brancas += 1
+                    continue
+                
+                # Caminho rápido: linha sem nenhum caractere que altere o estado
+                if not em_bloco and not em_text_block and b"/" not in linha \
+                        and b'"' not in linha and b"'" not in linha:
+                    codigo += 1
+                    continue
+                
+                tem_codigo = tem_comentario = False
+                pos = 0
+                tamanho = len(linha)
+                while pos < tamanho:
+                    if em_bloco:
+                        tem_comentario = True
+                        fim = linha.find(b"*/", pos)
+                        if fim < 0:
+                            break
+                        em_bloco = False
+                        pos = fim + 2
+                        continue
+                    if em_text_block:
+                        tem_codigo = True
+                        fim = linha.find(b'"""', pos)
+                        if fim < 0:
+                            break
+                        em_text_block = False
+                        pos = fim + 3
+                        continue
+                    
+                    token = _TOKENS_JAVA.search(linha, pos)
+                    if token is None:
+                        tem_codigo = tem_codigo or bool(linha[pos:].strip())
+                        break
+                    if token.start() > pos and linha[pos:token.start()].strip():
+                        tem_codigo = True
+                    texto = token.group()
+                    if texto == b"//":
+                        tem_comentario = True
+                        break
+                    if texto == b"/*":
+                        em_bloco = tem_comentario = True
+                    elif texto == b'"""':
+                        em_text_block = True
+                    else:
+                        tem_codigo = True
+                    pos = token.end()
+                
+                if tem_codigo:
+                    codigo += 1
+                elif tem_comentario:
+                    comentarios += 1
+                else:
+                    brancas += 1
+    return codigo, comentarios, brancas
+
+
+def _contar_lote_arquivos_java(caminhos):
+    # O último valor é o tempo de CPU gasto no lote, para a instrumentação por repositório
+    cpu = time.thread_time()
+    totais = [0, 0, 0]
+    for caminho in caminhos:
+        for i, valor in enumerate(contar_linhas_arquivo_java(caminho)):
+            totais[i] += valor
+    return totais + [time.thread_time() - cpu]
+
+
+def contar_loc_java(raiz, executor=None, bytes_por_lote=8 * 1024 * 1024, extensoes=(".java",), registro=None):
+    """
+    Conta linhas de código, comentário e brancas de todos os arquivos .java sob raiz.
+    Os arquivos são agrupados em lotes de ~bytes_por_lote e, com um executor (pool de
+    processos), os lotes são contados em paralelo. Outras linguagens com a sintaxe de
+    comentários do Java (Kotlin, Scala, C#...) podem ser contadas com extensoes.
+    Retorna {'loc': ..., 'comments': ..., 'linhas_brancas': ...}; com registro (de
+    Instrumentacao.etapa), soma nele o tempo de CPU gasto pelos workers do executor.
+    """
+    lotes = [[]]
+    tamanho_lote = 0
+    for diretorio, subdiretorios, arquivos in os.walk(raiz):
+        subdiretorios[:] = [d for d in subdiretorios if d != ".git"]
+        for nome in arquivos:
+            if not nome.endswith(tuple(extensoes)):
+                continue
+            caminho = os.path.join(diretorio, nome)
+            try:
+                tamanho = os.path.getsize(caminho)
+            except OSError:
+                continue
+            if tamanho_lote >= bytes_por_lote:
+                lotes.append([])
+                tamanho_lote = 0
+            lotes[-1].append(caminho)
+            tamanho_lote += tamanho
+    
+    em_paralelo = executor is not None and len(lotes) > 1
+    if em_paralelo:
+        parciais = executor.map(_contar_lote_arquivos_java, lotes)
+    else:
+        parciais = map(_contar_lote_arquivos_java, lotes)
+    
+    codigo = comentarios = brancas = 0
+    cpu_workers = 0.0
+    for parcial in parciais:
+        codigo += parcial[0]
+        comentarios += parcial[1]
+        brancas += parcial[2]
+        cpu_workers += parcial[3]
+    if registro is not None and em_paralelo:
+        # Sem executor a contagem roda na própria thread e já entra no tempo de CPU dela
+        registro['cpu_subprocessos_s'] = registro.get('cpu_subprocessos_s', 0.0) + cpu_workers
+    return {'loc': codigo, 'comments': comentarios, 'linhas_brancas': brancas}
+
+
+class PipelineCK:
+    """
+    Pipeline real de análise CK: git clone raso → ferramenta CK → agregação do class.csv.
+    Clones (rede) e execuções do CK (JVM) rodam em threads limitadas por semáforos próprios,
+    e a leitura do class.csv roda em um pool de processos, de modo que os três estágios se
+    sobrepõem. Cada clone é removido assim que o CK termina, mantendo o disco limitado.
+    Uma mesma instância pode atender a vários estudos ao mesmo tempo (ver compartilhado()):
+    os semáforos e o pool de processos limitam o total, e cada chamada de processar pode
+    usar o seu próprio extrator.
+    """
+
+    def __init__(self, ck_comando, temp_dir, workers_clone=4, workers_ck=2, workers_parse=None, timeout=1800,
+                 dir_classes=None, instrumentacao=None):
+        # ck_comando é uma lista de argumentos com os marcadores {projeto} e {saida}
+        self.ck_comando = list(ck_comando)
+        # Com dir_classes, as métricas por classe são gravadas em Parquet particionado por repositório
+        self.dir_classes = dir_classes
+        self.instrumentacao = instrumentacao
+        self.temp_dir = Path(temp_dir).resolve()
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.workers_clone = workers_clone
+        self.workers_ck = workers_ck
+        self.workers_parse = workers_parse
+        self.timeout = timeout
+        self._sem_clone = threading.Semaphore(workers_clone)
+        self._sem_ck = threading.Semaphore(workers_ck)
+        self._pool_parse = None
+
+    def _clonar(self, repo, destino, registro=None):
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        executar_subprocesso(
+            ["git", "clone", "--depth", "1", "--filter=blob:none", "--quiet", repo['clone_url'], str(destino)],
+            timeout=self.timeout, registro=registro, env=env
+        )
+
+    def _executar_ck(self, projeto, saida, ck_comando=None, registro=None):
+        comando = [arg.format(projeto=projeto, saida=saida) for arg in ck_comando or self.ck_comando]
+        executar_subprocesso(comando, timeout=self.timeout, registro=registro, cwd=saida)
+        caminho_csv = Path(saida) / "class.csv"
+        if not caminho_csv.exists():
+            raise FileNotFoundError(f"CK não gerou {caminho_csv}")
+        return caminho_csv
+
+    def _medir(self, etapa, repo):
+        if self.instrumentacao is None:
+            return contextlib.nullcontext({})
+        return self.instrumentacao.etapa(etapa, repo['full_name'])
+
+    def _clonar_e_analisar(self, repo, ck_comando=None, extensoes=(".java",)):
+        """
+        Executa os estágios de clone e CK (ou de outro extrator no mesmo formato) de um repositório.
+        Retorna o diretório de trabalho (com a saída do CK), o SHA analisado e a contagem de linhas.
+        """
+        trabalho = Path(tempfile.mkdtemp(prefix=repo['full_name'].replace('/', '__') + '-', dir=self.temp_dir))
+        projeto = trabalho / "projeto"
+        saida = trabalho / "ck"
+        saida.mkdir()
+        try:
+            with self._sem_clone, self._medir("clone", repo) as registro:
+                self._clonar(repo, projeto, registro)
+                registro['bytes'] = tamanho_diretorio(projeto / ".git")
+            with self._sem_ck, self._medir("ck", repo) as registro:
+                self._executar_ck(projeto, saida, ck_comando, registro)
+            sha = subprocess.run(
+                ["git", "-C", str(projeto), "rev-parse", "HEAD"], check=True, capture_output=True, text=True
+            ).stdout.strip()
+            # Contagem de LOC/comentários no pool de processos, antes de apagar o clone
+            with self._medir("contagem_loc", repo) as registro:
+                linhas = contar_loc_java(projeto, self._pool_parse, extensoes=extensoes, registro=registro)
+        except BaseException:
+            shutil.rmtree(trabalho, ignore_errors=True)
+            raise
+        shutil.rmtree(projeto, ignore_errors=True)
+        return trabalho, sha, linhas
+
+    def _tarefa_repositorio(self, repo, reaproveitar, ck_comando, extensoes):
+        if reaproveitar is not None:
+            metricas = reaproveitar(repo)
+            if metricas is not None:
+                return None, metricas
+        return self._clonar_e_analisar(repo, ck_comando, extensoes), None
+    
+    @contextlib.contextmanager
+    def compartilhado(self):
+        """
+        Mantém o pool de processos aberto entre chamadas de processar, para que estudos
+        executados em paralelo usem os mesmos workers em vez de um pool cada
+        """
+        with ProcessPoolExecutor(max_workers=self.workers_parse) as pool_parse:
+            self._pool_parse = pool_parse
+            try:
+                yield self
+            finally:
+                self._pool_parse = None
+    
+    def processar(self, repos, reaproveitar=None, ck_comando=None, extensoes=(".java",), dir_classes=None):
+        """
+        Gera (indice, repo, metricas, erro) à medida que cada repositório termina.
+        Se o iterável repos levantar uma exceção, os repositórios já enviados terminam e
+        a exceção é levantada aqui.
+        As métricas incluem o SHA analisado em 'sha' e as contagens de contar_loc_java.
+        repos pode ser qualquer iterável, inclusive um gerador da coleta.
+        reaproveitar(repo), se informada, roda nas threads do pipeline antes do clone e pode
+        devolver métricas já conhecidas para dispensar o clone e o CK.
+        ck_comando e dir_classes substituem, nesta chamada, os valores do construtor.
+        """
+        resultados = queue.Queue()
+        em_andamento = threading.Semaphore(self.workers_clone + self.workers_ck)
+        fim = object()
+        dir_classes = dir_classes or self.dir_classes
+        
+        with contextlib.ExitStack() as pilha:
+            pool_repos = pilha.enter_context(ThreadPoolExecutor(max_workers=self.workers_clone + self.workers_ck))
+            if self._pool_parse is None:
+                pilha.enter_context(self.compartilhado())
+            pool_parse = self._pool_parse
+            
+            def concluir_parse(futuro, indice, repo, trabalho, sha, linhas):
+                shutil.rmtree(trabalho, ignore_errors=True)
+                erro = futuro.exception()
+                if erro is not None:
+                    resultados.put((indice, repo, None, erro))
+                    return
+                metricas = futuro.result()
+                metricas.update(linhas)
+                metricas['sha'] = sha
+                resultados.put((indice, repo, metricas, None))
+            
+            def concluir_ck(futuro, indice, repo):
+                em_andamento.release()
+                erro = futuro.exception()
+                if erro is not None:
+                    resultados.put((indice, repo, None, erro))
+                    return
+                analise, metricas = futuro.result()
+                if metricas is not None:
+                    resultados.put((indice, repo, metricas, None))
+                    return
+                trabalho, sha, linhas = analise
+                destino = None
+                if dir_classes is not None:
+                    destino = str(particao_repositorio(dir_classes, repo['full_name']))
+                parse = pool_parse.submit(agregar_class_csv, str(trabalho / "ck" / "class.csv"), destino)
+                parse.add_done_callback(lambda f: concluir_parse(f, indice, repo, trabalho, sha, linhas))
+            
+            def alimentar():
+                # Uma falha ao gerar os repositórios (por exemplo, na coleta) é repassada ao consumidor
+                total = 0
+                erro = None
+                try:
+                    for indice, repo in enumerate(repos):
+                        em_andamento.acquire()
+                        futuro = pool_repos.submit(self._tarefa_repositorio, repo, reaproveitar, ck_comando, extensoes)
+                        futuro.add_done_callback(lambda f, i=indice, r=repo: concluir_ck(f, i, r))
+                        total += 1
+                except BaseException as e:
+                    erro = e
+                finally:
+                    resultados.put((fim, total, erro))
+            
+            alimentador = threading.Thread(target=alimentar, daemon=True)
+            alimentador.start()
+            
+            recebidos = 0
+            total = erro_alimentacao = None
+            while total is None or recebidos < total:
+                item = resultados.get()
+                if item[0] is fim:
+                    _, total, erro_alimentacao = item
+                    continue
+                recebidos += 1
+                yield item
+            alimentador.join()
+            if erro_alimentacao is not None:
+                # Os repositórios já gerados foram entregues; a execução não termina como se estivesse completa
+                raise erro_alimentacao
+
+
+def obter_sha_remoto(clone_url, timeout=60):
+    """
+    Consulta o SHA do HEAD de um repositório remoto sem cloná-lo (git ls-remote)
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    try:
+        saida = subprocess.run(
+            ["git", "ls-remote", clone_url, "HEAD"], check=True, capture_output=True,
+            text=True, timeout=timeout, env=env
+        ).stdout.split()
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return saida[0] if saida else None
+
+
+class ArmazemResultadosCK:
+    """
+    Armazena os resultados do CK por full_name e SHA do HEAD analisado (SQLite).
+    Cada repositório é gravado assim que termina, de modo que uma execução interrompida
+    retoma do último checkpoint e repositórios com SHA inalterado não são reanalisados.
+    Cada resultado guarda a versão das métricas (VERSAO); resultados de versões anteriores
+    não são reaproveitados e o repositório é analisado de novo.
+    """
+
+    # 1: sem loc/comments (anteriores ao contador de LOC); 2: com loc e comments do clone
+    VERSAO = 2
+
+    def __init__(self, caminho="dataset/resultados_ck.sqlite"):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                full_name TEXT PRIMARY KEY,
+                sha TEXT NOT NULL,
+                analisado_em REAL NOT NULL,
+                repo TEXT NOT NULL,
+                metricas TEXT NOT NULL,
+                versao INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(resultados)")}
+        if 'versao' not in colunas:
+            self._conn.execute("ALTER TABLE resultados ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+        self._conn.commit()
+
+    def shas(self):
+        """
+        SHAs dos resultados reaproveitáveis (gravados com a versão atual das métricas)
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT full_name, sha FROM resultados WHERE versao = ?", (self.VERSAO,)))
+
+    def salvar(self, repo, metricas):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resultados (full_name, sha, analisado_em, repo, metricas, versao) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (repo['full_name'], metricas['sha'], time.time(), json.dumps(dict(repo)), json.dumps(metricas),
+                 self.VERSAO)
+            )
+            self._conn.commit()
+
+    def atualizar_repo(self, repo):
+        """
+        Atualiza os dados da API (estrelas, forks...) de um resultado sem tocar nas métricas
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE resultados SET repo = ? WHERE full_name = ?", (json.dumps(dict(repo)), repo['full_name'])
+            )
+            self._conn.commit()
+
+    def metricas(self, full_name):
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT metricas FROM resultados WHERE full_name = ?", (full_name,)
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def atualizar_metricas(self, full_name, agregados):
+        """
+        Substitui os agregados de um resultado, preservando o SHA e os demais campos
+        """
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT metricas FROM resultados WHERE full_name = ?", (full_name,)
+            ).fetchone()
+            if linha is None:
+                return False
+            metricas = json.loads(linha[0])
+            metricas.update(agregados)
+            self._conn.execute(
+                "UPDATE resultados SET metricas = ? WHERE full_name = ?", (json.dumps(metricas), full_name)
+            )
+            self._conn.commit()
+        return True
+
+
+# Métricas de processo (RQ01-RQ04) e de qualidade correlacionadas entre si
+METRICAS_PROCESSO = ['stars', 'age_years', 'releases_count', 'loc', 'comments']
+METRICAS_QUALIDADE = ['cbo', 'dit', 'lcom', 'wmc', 'rfc', 'lcom3', 'ca', 'ce', 'npm']
+# Métricas de qualidade das questões de pesquisa (RQ01-RQ04)
+METRICAS_QUALIDADE_RQ = ['cbo', 'dit', 'lcom']
+
+
+def _padronizar_colunas(matriz):
+    """
+    Centraliza cada coluna e a divide pela sua norma, de modo que Z.T @ Z seja a correlação
+    """
+    import numpy as np
+    
+    centralizada = matriz - matriz.mean(axis=0)
+    norma = np.sqrt((centralizada ** 2).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return centralizada / norma
+
+
+def matrizes_correlacao(x, y):
+    """
+    Calcula as matrizes de correlação de Pearson e de Spearman entre todas as colunas de x e
+    todas as colunas de y. Cada coluna é ranqueada uma única vez e cada matriz sai de um
+    único produto matricial.
+    """
+    import numpy as np
+    from scipy.stats import rankdata
+    
+    pearson = _padronizar_colunas(x).T @ _padronizar_colunas(y)
+    spearman = _padronizar_colunas(rankdata(x, axis=0)).T @ _padronizar_colunas(rankdata(y, axis=0))
+    return np.clip(pearson, -1, 1), np.clip(spearman, -1, 1)
+
+
+def p_valores_correlacao(r, n):
+    """
+    P-valores bicaudais das correlações pela distribuição t com n - 2 graus de liberdade
+    """
+    import numpy as np
+    from scipy import stats
+    
+    graus = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = r * np.sqrt(graus / ((1 - r) * (1 + r)))
+    return 2 * stats.t.sf(np.abs(t), graus)
+
+
+# Limite de elementos das matrizes de um lote de reamostragem (~32 MB em float64)
+ELEMENTOS_POR_LOTE = 4_000_000
+
+
+def _padronizar_lote(lote):
+    """
+    Versão em lote de _padronizar_colunas para arrays (reamostras, n, colunas)
+    """
+    import numpy as np
+    
+    centralizado = lote - lote.mean(axis=1, keepdims=True)
+    norma = np.sqrt((centralizado ** 2).sum(axis=1, keepdims=True))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return centralizado / norma
+
+
+def _lote_bootstrap(x, y, semente, tamanho):
+    """
+    Correlações de Pearson e Spearman de um lote de reamostras bootstrap (linhas com reposição)
+    """
+    import numpy as np
+    from scipy.stats import rankdata
+    
+    rng = np.random.default_rng(semente)
+    indices = rng.integers(0, len(x), size=(tamanho, len(x)))
+    xb, yb = x[indices], y[indices]
+    pearson = np.einsum('bnp,bnq->bpq', _padronizar_lote(xb), _padronizar_lote(yb))
+    spearman = np.einsum('bnp,bnq->bpq', _padronizar_lote(rankdata(xb, axis=1)),
+                         _padronizar_lote(rankdata(yb, axis=1)))
+    return pearson, spearman
+
+
+def _lote_permutacao(x, y, semente, tamanho, pearson_obs, spearman_obs):
+    """
+    Conta, para um lote de permutações de y, quantas correlações igualam ou superam
+    (em módulo) as observadas. Os ranks não mudam com a permutação, então são calculados uma vez.
+    """
+    import numpy as np
+    from scipy.stats import rankdata
+    
+    rng = np.random.default_rng(semente)
+    indices = rng.permuted(np.tile(np.arange(len(y)), (tamanho, 1)), axis=1)
+    contagens = []
+    for zx, zy, observada in ((_padronizar_colunas(x), _padronizar_colunas(y), pearson_obs),
+                              (_padronizar_colunas(rankdata(x, axis=0)), _padronizar_colunas(rankdata(y, axis=0)),
+                               spearman_obs)):
+        permutadas = np.einsum('np,bnq->bpq', zx, zy[indices])
+        contagens.append((np.abs(permutadas) >= np.abs(observada) - 1e-12).sum(axis=0))
+    return contagens
+
+
+def reamostrar_correlacoes(x, y, reamostras=10000, semente=42, nivel_confianca=0.95, workers=None,
+                           permutacao=True):
+    """
+    Intervalos de confiança bootstrap (percentil) e p-valores de permutação para todos os
+    pares processo x qualidade. As reamostras são geradas em lotes de índices, cada lote com
+    sua própria semente derivada de `semente`, e os lotes são distribuídos em um pool de processos.
+    Com permutacao=False, só os intervalos são calculados.
+    """
+    import numpy as np
+    
+    tamanho_lote = max(1, min(reamostras, ELEMENTOS_POR_LOTE // (len(x) * (x.shape[1] + y.shape[1]))))
+    tamanhos = [tamanho_lote] * (reamostras // tamanho_lote)
+    if reamostras % tamanho_lote:
+        tamanhos.append(reamostras % tamanho_lote)
+    sementes_bootstrap, sementes_permutacao = np.random.SeedSequence(semente).spawn(2)
+    
+    pearson_obs, spearman_obs = matrizes_correlacao(x, y)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        bootstrap = list(executor.map(
+            _lote_bootstrap, [x] * len(tamanhos), [y] * len(tamanhos),
+            sementes_bootstrap.spawn(len(tamanhos)), tamanhos
+        ))
+        if permutacao:
+            lotes_permutacao = list(executor.map(
+                _lote_permutacao, [x] * len(tamanhos), [y] * len(tamanhos),
+                sementes_permutacao.spawn(len(tamanhos)), tamanhos,
+                [pearson_obs] * len(tamanhos), [spearman_obs] * len(tamanhos)
+            ))
+    
+    alfa = (1 - nivel_confianca) / 2
+    resultado = {}
+    for k, metodo in enumerate(('pearson', 'spearman')):
+        distribuicao = np.concatenate([lote[k] for lote in bootstrap])
+        resultado[metodo] = {
+            'ic_inferior': np.nanquantile(distribuicao, alfa, axis=0),
+            'ic_superior': np.nanquantile(distribuicao, 1 - alfa, axis=0),
+        }
+        if permutacao:
+            extremos = sum(lote[k] for lote in lotes_permutacao)
+            resultado[metodo]['p_permutacao'] = (extremos + 1) / (reamostras + 1)
+    return resultado
+
+
+DPI_GRAFICOS = 300
+DPI_PREVIEW = 72
+# Resolução dos gráficos embutidos no relatório em PDF
+DPI_PDF = 150
+
+# Faixas usadas nos gráficos de pizza (e na estratificação da amostra)
+FAIXAS_POPULARIDADE = {
+    'bins': [0, 100, 1000, 10000, float('inf')],
+    'labels': ['Baixa (≤100)', 'Media (101-1K)', 'Alta (1K-10K)', 'Muito Alta (>10K)'],
+}
+FAIXAS_IDADE = {
+    'bins': [0, 3, 6, 10, float('inf')],
+    'labels': ['Novo (≤3 anos)', 'Jovem (3-6 anos)', 'Maduro (6-10 anos)', 'Veterano (>10 anos)'],
+}
+FAIXAS_ATIVIDADE = {
+    'bins': [0, 10, 50, 100, float('inf')],
+    'labels': ['Baixa (≤10)', 'Media (11-50)', 'Alta (51-100)', 'Muito Alta (>100)'],
+}
+FAIXAS_TAMANHO = {
+    'bins': [0, 10000, 100000, 1000000, float('inf')],
+    'labels': ['Pequeno (≤10K)', 'Medio (10K-100K)', 'Grande (100K-1M)', 'Muito Grande (>1M)'],
+}
+
+# Amostragem do CK estratificada pelas faixas de popularidade, idade e tamanho dos gráficos.
+# Antes do CK o LOC não é conhecido e é estimado pelo tamanho em KB, com a razão média
+# (8 a 15 linhas por KB) da estimativa de _linha_dataset.
+LOC_POR_KB = 11.5
+
+
+def _faixa(valor, faixas):
+    # Mesmo critério de pd.cut(..., include_lowest=True): intervalos fechados à direita
+    return max(0, min(bisect.bisect_left(faixas['bins'], valor) - 1, len(faixas['labels']) - 1))
+
+
+def estrato_repositorio(repo):
+    """
+    Retorna as faixas (popularidade, idade, tamanho) do repositório
+    """
+    loc = repo.get('loc') or (repo.get('size') or 0) * LOC_POR_KB
+    return (_faixa(repo['stars'], FAIXAS_POPULARIDADE), _faixa(repo['age_years'], FAIXAS_IDADE),
+            _faixa(loc, FAIXAS_TAMANHO))
+
+
+def ordem_estratificada(repos, semente=42):
+    """
+    Ordena os repositórios para uma amostra estratificada proporcional. Os estratos são as
+    combinações de faixas de estrato_repositorio; cada estrato é embaralhado e o k-ésimo
+    repositório de um estrato com n_e de N repositórios entra na posição (k + 0,5)·N/n_e.
+    Assim, qualquer prefixo da ordem é uma amostra estratificada e a análise pode parar a qualquer momento.
+    """
+    rng = random.Random(semente)
+    estratos = {}
+    for repo in repos:
+        estratos.setdefault(estrato_repositorio(repo), []).append(repo)
+    total = sum(len(grupo) for grupo in estratos.values())
+    for chave in sorted(estratos):
+        rng.shuffle(estratos[chave])
+    
+    fila = [(0.5 * total / len(grupo), chave, 0) for chave, grupo in sorted(estratos.items())]
+    heapq.heapify(fila)
+    while fila:
+        _, chave, k = heapq.heappop(fila)
+        grupo = estratos[chave]
+        yield grupo[k]
+        if k + 1 < len(grupo):
+            heapq.heappush(fila, ((k + 1.5) * total / len(grupo), chave, k + 1))
+
+
+CORES_PROCESSO = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+CORES_QUALIDADE = ['#2ECC71', '#F39C12', '#E74C3C', '#8E44AD']
+
+# Registro dos gráficos de pizza: um por métrica de processo (RQ01-RQ04) e de qualidade
+GRAFICOS_PIZZA = [
+    dict(arquivo='distribuicao_popularidade', coluna='stars', **FAIXAS_POPULARIDADE,
+         cores=CORES_PROCESSO, explode=[0.05, 0.03, 0.02, 0.1],
+         titulo='Distribuicao de Repositorios por Popularidade\n(Numero de Estrelas)'),
+    dict(arquivo='distribuicao_idade', coluna='age_years', **FAIXAS_IDADE,
+         cores=CORES_PROCESSO, explode=[0.05, 0.03, 0.02, 0.1],
+         titulo='Distribuicao de Repositorios por Maturidade\n(Idade em Anos)'),
+    dict(arquivo='distribuicao_atividade', coluna='releases_count', **FAIXAS_ATIVIDADE,
+         cores=CORES_PROCESSO, explode=[0.05, 0.03, 0.02, 0.1],
+         titulo='Distribuicao de Repositorios por Atividade\n(Numero de Releases)'),
+    dict(arquivo='distribuicao_tamanho', coluna='loc', **FAIXAS_TAMANHO,
+         cores=CORES_PROCESSO, explode=[0.05, 0.03, 0.02, 0.1],
+         titulo='Distribuicao de Repositorios por Tamanho\n(Linhas de Codigo)'),
+    dict(arquivo='niveis_qualidade_cbo', coluna='cbo',
+         bins=[0, 5, 10, 15, float('inf')],
+         labels=['Excelente (≤5)', 'Bom (6-10)', 'Regular (11-15)', 'Ruim (>15)'],
+         cores=CORES_QUALIDADE, explode=[0.1, 0.05, 0.02, 0.02],
+         titulo='Distribuicao de Qualidade por CBO\n(Coupling Between Objects)'),
+    dict(arquivo='niveis_complexidade_dit', coluna='dit',
+         bins=[0, 2, 4, 6, float('inf')],
+         labels=['Raso (≤2)', 'Moderado (2-4)', 'Profundo (4-6)', 'Muito Profundo (>6)'],
+         cores=CORES_QUALIDADE, explode=[0.1, 0.05, 0.02, 0.02],
+         titulo='Distribuicao de Complexidade por DIT\n(Depth Inheritance Tree)'),
+    # As faixas de coesão pressupõem a escala 0-1 do LCOM* normalizado (coluna lcom3); o lcom
+    # do CK é uma contagem de pares de métodos e não tem limite superior
+    dict(arquivo='niveis_coesao_lcom', coluna='lcom3',
+         bins=[0, 0.25, 0.5, 0.75, float('inf')],
+         labels=['Alta (≤0.25)', 'Boa (0.25-0.5)', 'Baixa (0.5-0.75)', 'Muito Baixa (>0.75)'],
+         cores=CORES_QUALIDADE, explode=[0.1, 0.05, 0.02, 0.02],
+         titulo='Distribuicao de Coesao por LCOM*\n(Lack of Cohesion of Methods, normalizado)'),
+    dict(arquivo='niveis_complexidade_wmc', coluna='wmc',
+         bins=[0, 20, 50, 100, float('inf')],
+         labels=['Baixa (≤20)', 'Moderada (21-50)', 'Alta (51-100)', 'Muito Alta (>100)'],
+         cores=CORES_QUALIDADE, explode=[0.1, 0.05, 0.02, 0.02],
+         titulo='Distribuicao de Complexidade por WMC\n(Weighted Methods per Class)'),
+    dict(arquivo='niveis_resposta_rfc', coluna='rfc',
+         bins=[0, 20, 50, 100, float('inf')],
+         labels=['Baixa (≤20)', 'Moderada (21-50)', 'Alta (51-100)', 'Muito Alta (>100)'],
+         cores=CORES_QUALIDADE, explode=[0.1, 0.05, 0.02, 0.02],
+         titulo='Distribuicao de Resposta por RFC\n(Response for Class)'),
+]
+
+
+def renderizar_grafico_pizza(spec, contagens, arquivo, dpi=DPI_GRAFICOS):
+    """
+    Renderiza um gráfico de pizza do registro GRAFICOS_PIZZA com o estilo padrão do laboratório.
+    Executada em processos separados, com o backend Agg.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    
+    # DejaVu Sans acompanha o matplotlib, evitando a busca de fontes inexistentes
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    plt.rcParams['font.size'] = 12
+    plt.rcParams['axes.unicode_minus'] = False
+    
+    # Faixas sem repositórios são omitidas, mantendo a cor e o destaque de cada faixa
+    indices = [i for i, rotulo in enumerate(spec['labels']) if contagens.get(rotulo, 0) > 0]
+    
+    fig, ax = plt.subplots(figsize=(10, 8))
+    wedges, texts, autotexts = ax.pie([contagens[spec['labels'][i]] for i in indices],
+                                      labels=[spec['labels'][i] for i in indices],
+                                      autopct='%1.1f%%',
+                                      colors=[spec['cores'][i] for i in indices],
+                                      startangle=90,
+                                      explode=[spec['explode'][i] for i in indices])
+    
+    ax.set_title(spec['titulo'], fontsize=16, fontweight='bold', pad=20)
+    
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(12)
+    
+    ax.axis('equal')
+    fig.tight_layout()
+    fig.savefig(arquivo, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return arquivo
+
+
+# Relatório: o documento é uma lista de seções (SECOES_RELATORIO). Cada seção extrai dos dados
+# apenas as entradas de que depende e as transforma em blocos (título, parágrafo, lista, tabela,
+# imagem), que são serializáveis e ficam em cache; os blocos são então renderizados em cada formato.
+# Ao mudar o texto ou o layout de uma seção, incremente VERSAO_RELATORIO para invalidar o cache.
+VERSAO_RELATORIO = 3
+FORMATOS_RELATORIO = ('txt', 'md', 'html', 'pdf')
+ARQUIVOS_RELATORIO = {
+    'txt': 'relatorio_analise.txt',
+    'md': 'relatorio_analise.md',
+    'html': 'relatorio_analise.html',
+    'pdf': 'relatorio_analise.pdf',
+}
+NIVEL_SIGNIFICANCIA = 0.05
+
+ROTULOS_METRICAS = {
+    'stars': 'Popularidade',
+    'age_years': 'Maturidade',
+    'releases_count': 'Atividade',
+    'loc': 'Tamanho',
+    'comments': 'Comentários',
+}
+
+QUESTOES_PESQUISA = [
+    dict(id='RQ01', titulo='Relação entre Popularidade e Qualidade', metricas=['stars']),
+    dict(id='RQ02', titulo='Relação entre Maturidade e Qualidade', metricas=['age_years']),
+    dict(id='RQ03', titulo='Relação entre Atividade e Qualidade', metricas=['releases_count']),
+    dict(id='RQ04', titulo='Relação entre Tamanho e Qualidade', metricas=['loc', 'comments']),
+]
+
+
+def _rotulo_metrica(metrica):
+    return ROTULOS_METRICAS.get(metrica, metrica.upper())
+
+
+def _sem_entradas(analisador, df, correlations):
+    # Seções de texto fixo: dependem apenas de VERSAO_RELATORIO
+    return {}
+
+
+def _entradas_resumo(analisador, df, correlations):
+    return {'total': len(df), 'estudo': analisador.estudo, 'consulta': analisador.consulta}
+
+
+def _secao_resumo(entradas):
+    # Em um lote, cada estudo tem a sua linguagem ou consulta; o título padrão é o do laboratório (Java)
+    if entradas['estudo']:
+        titulo = f"RELATÓRIO DE ANÁLISE DE QUALIDADE - ESTUDO {entradas['estudo'].upper()}"
+        sistemas = f"sistemas da consulta \"{entradas['consulta']}\""
+    else:
+        titulo = 'RELATÓRIO DE ANÁLISE DE QUALIDADE DE SISTEMAS JAVA'
+        sistemas = 'sistemas Java'
+    blocos = [
+        {'tipo': 'titulo', 'nivel': 1, 'texto': titulo},
+        {'tipo': 'titulo', 'nivel': 2, 'texto': 'RESUMO EXECUTIVO'},
+        {'tipo': 'paragrafo', 'texto':
+            f'Este relatório apresenta uma análise das características de qualidade de {sistemas} '
+            'desenvolvidos em repositórios open-source do GitHub. Foram analisados '
+            f"{entradas['total']} repositórios selecionados por popularidade, utilizando métricas CK "
+            'para avaliação da qualidade do código.'},
+    ]
+    if entradas['estudo']:
+        blocos.append({'tipo': 'paragrafo',
+                       'texto': f"Estudo: {entradas['estudo']} (consulta: {entradas['consulta']})"})
+    return blocos
+
+
+def _entradas_estatisticas(analisador, df, correlations):
+    faixas = {coluna: [float(df[coluna].min()), float(df[coluna].max())]
+              for coluna in ('stars', 'age_years', 'loc') if coluna in df.columns}
+    resumo = {metrica: [float(df[metrica].mean()), float(df[metrica].median()), float(df[metrica].std())]
+              for metrica in METRICAS_QUALIDADE if metrica in df.columns}
+    return {'total': len(df), 'faixas': faixas, 'qualidade': resumo}
+
+
+def _secao_estatisticas(entradas):
+    faixas = entradas['faixas']
+    itens = [f"Total de repositórios analisados: {entradas['total']}"]
+    if 'stars' in faixas:
+        itens.append(f"Faixa de popularidade: {faixas['stars'][0]:,.0f} - {faixas['stars'][1]:,.0f} estrelas")
+    if 'age_years' in faixas:
+        itens.append(f"Faixa de idade: {faixas['age_years'][0]:.1f} - {faixas['age_years'][1]:.1f} anos")
+    if 'loc' in faixas:
+        itens.append(f"Faixa de tamanho: {faixas['loc'][0]:,.0f} - {faixas['loc'][1]:,.0f} LOC")
+    
+    qualidade = entradas['qualidade']
+    casas = {'lcom': 3}
+    return [
+        {'tipo': 'titulo', 'nivel': 2, 'texto': 'ESTATÍSTICAS DESCRITIVAS'},
+        {'tipo': 'lista', 'itens': itens},
+        {'tipo': 'titulo', 'nivel': 3, 'texto': 'Métricas de Qualidade:'},
+        {'tipo': 'lista', 'itens': [
+            f"{metrica.upper()} médio: {media:.{casas.get(metrica, 2)}f} "
+            f"(desvio padrão: {desvio:.{casas.get(metrica, 2)}f})"
+            for metrica, (media, _, desvio) in qualidade.items() if metrica in METRICAS_QUALIDADE_RQ
+        ]},
+        {'tipo': 'tabela', 'colunas': ['Métrica', 'Média', 'Mediana', 'Desvio padrão'],
+         'linhas': [[metrica.upper(), f"{media:.3f}", f"{mediana:.3f}", f"{desvio:.3f}"]
+                    for metrica, (media, mediana, desvio) in qualidade.items()]},
+    ]
+
+
+def _secao_questoes(entradas):
+    return [{'tipo': 'titulo', 'nivel': 2, 'texto': 'RESULTADOS DAS QUESTÕES DE PESQUISA'}]
+
+
+def _tabela_correlacoes(pares):
+    """
+    Tabela com uma linha por par (rótulo, resultado de calcular_correlacoes). As colunas de
+    reamostragem só aparecem quando as correlações foram calculadas com reamostras > 0.
+    """
+    com_ic = any('ic' in resultado['spearman'] for _, resultado in pares)
+    colunas = ['Métrica', 'Pearson r', 'p', 'Spearman ρ', 'p']
+    if com_ic:
+        colunas += ['IC Spearman', 'p perm.']
+    linhas = []
+    for rotulo, resultado in pares:
+        pearson, spearman = resultado['pearson'], resultado['spearman']
+        linha = [rotulo, f"{pearson['correlation']:.3f}", f"{pearson['p_value']:.3f}",
+                 f"{spearman['correlation']:.3f}", f"{spearman['p_value']:.3f}"]
+        if com_ic:
+            inferior, superior = spearman.get('ic', (float('nan'), float('nan')))
+            linha += [f"[{inferior:.3f}, {superior:.3f}]", f"{spearman.get('p_permutacao', float('nan')):.4f}"]
+        linhas.append(linha)
+    return {'tipo': 'tabela', 'colunas': colunas, 'linhas': linhas}
+
+
+def _entradas_questao(questao):
+    def entradas(analisador, df, correlations):
+        presentes = {metrica: correlations[metrica] for metrica in questao['metricas'] if metrica in correlations}
+        return {'questao': questao, 'correlacoes': presentes} if presentes else None
+    return entradas
+
+
+def _secao_questao(entradas):
+    questao = entradas['questao']
+    blocos = [{'tipo': 'titulo', 'nivel': 3, 'texto': f"{questao['id']}: {questao['titulo']}"}]
+    for metrica, por_qualidade in entradas['correlacoes'].items():
+        rotulo = _rotulo_metrica(metrica)
+        blocos.append({'tipo': 'lista', 'itens': [
+            f"{rotulo} vs {qualidade.upper()}: r = {resultado['pearson']['correlation']:.3f}, "
+            f"p = {resultado['pearson']['p_value']:.3f}"
+            for qualidade, resultado in por_qualidade.items() if qualidade in METRICAS_QUALIDADE_RQ
+        ]})
+        blocos.append(_tabela_correlacoes([(f"{rotulo} vs {qualidade.upper()}", resultado)
+                                           for qualidade, resultado in por_qualidade.items()]))
+    return blocos
+
+
+def _entradas_outras_correlacoes(analisador, df, correlations):
+    cobertas = {metrica for questao in QUESTOES_PESQUISA for metrica in questao['metricas']}
+    outras = {metrica: valores for metrica, valores in correlations.items() if metrica not in cobertas}
+    return outras or None
+
+
+def _secao_outras_correlacoes(entradas):
+    return [
+        {'tipo': 'titulo', 'nivel': 3, 'texto': 'Outras métricas de processo'},
+        _tabela_correlacoes([(f"{_rotulo_metrica(metrica)} vs {qualidade.upper()}", resultado)
+                             for metrica, por_qualidade in entradas.items()
+                             for qualidade, resultado in por_qualidade.items()]),
+    ]
+
+
+def _entradas_graficos(analisador, df, correlations):
+    # Os gráficos entram pela assinatura gravada por criar_graficos_pizza, não pelos pixels
+    destino = Path(analisador.output_dir)
+    caminho_manifesto = destino / ".graficos.json"
+    manifesto = json.loads(caminho_manifesto.read_text()) if caminho_manifesto.exists() else {}
+    graficos = [[f"{spec['arquivo']}.png", spec['titulo'].replace('\n', ' '), manifesto.get(spec['arquivo'])]
+                for spec in GRAFICOS_PIZZA if (destino / f"{spec['arquivo']}.png").exists()]
+    return graficos or None
+
+
+def _secao_graficos(entradas):
+    return ([{'tipo': 'titulo', 'nivel': 2, 'texto': 'VISUALIZAÇÕES'}]
+            + [{'tipo': 'imagem', 'arquivo': arquivo, 'legenda': legenda} for arquivo, legenda, _ in entradas])
+
+
+def _entradas_discussao(analisador, df, correlations):
+    significativas = [
+        [metrica, qualidade, resultado['spearman']['correlation']]
+        for metrica, por_qualidade in correlations.items()
+        for qualidade, resultado in por_qualidade.items()
+        if resultado['spearman']['p_value'] < NIVEL_SIGNIFICANCIA
+    ]
+    return {'metricas': list(correlations), 'significativas': sorted(significativas, key=lambda item: -abs(item[2]))}
+
+
+def _achado_metrica(metrica, significativas):
+    """
+    Resume em uma frase as correlações significativas de uma métrica de processo
+    """
+    pares = [(qualidade.upper(), rho) for outra, qualidade, rho in significativas if outra == metrica]
+    rotulo = _rotulo_metrica(metrica)
+    if not pares:
+        return f"{rotulo}: nenhuma correlação significativa com as métricas de qualidade."
+    sentidos = []
+    positivas = [qualidade for qualidade, rho in pares if rho > 0]
+    negativas = [qualidade for qualidade, rho in pares if rho < 0]
+    if positivas:
+        sentidos.append(f"positiva com {', '.join(positivas)}")
+    if negativas:
+        sentidos.append(f"negativa com {', '.join(negativas)}")
+    qualidade, rho = pares[0]
+    return (f"{rotulo}: correlação significativa {' e '.join(sentidos)}; "
+            f"a mais forte é com {qualidade} (ρ = {rho:.3f}).")
+
+
+def _secao_discussao(entradas):
+    significativas = entradas['significativas']
+    blocos = [
+        {'tipo': 'titulo', 'nivel': 2, 'texto': 'DISCUSSÃO'},
+        {'tipo': 'paragrafo', 'texto':
+            f"Relação entre cada característica do processo de desenvolvimento e a qualidade interna "
+            f"do código (Spearman, p < {NIVEL_SIGNIFICANCIA}):"},
+        {'tipo': 'lista', 'itens': [
+            f"{questao['id']} - {_achado_metrica(metrica, significativas)}"
+            for questao in QUESTOES_PESQUISA for metrica in questao['metricas'] if metrica in entradas['metricas']
+        ]},
+    ]
+    if significativas:
+        blocos += [
+            {'tipo': 'paragrafo', 'texto': 'Correlações significativas, da mais forte para a mais fraca:'},
+            {'tipo': 'lista', 'itens': [f"{_rotulo_metrica(metrica)} vs {qualidade.upper()}: ρ = {rho:.3f}"
+                                        for metrica, qualidade, rho in significativas]},
+        ]
+    else:
+        blocos.append({'tipo': 'paragrafo', 'texto': 'Nenhuma correlação de Spearman foi significativa.'})
+    return blocos
+
+
+def _secao_conclusoes(entradas):
+    # Força de cada métrica de processo: o maior |ρ| dentre as suas correlações significativas
+    forca = {}
+    for metrica, _, rho in entradas['significativas']:
+        forca.setdefault(metrica, abs(rho))
+    sem_relacao = [metrica for metrica in entradas['metricas'] if metrica not in forca]
+    
+    itens = []
+    if forca:
+        principais = list(forca)[:2]
+        itens.append(f"{' e '.join(_rotulo_metrica(metrica) for metrica in principais)} "
+                     f"{'são os fatores' if len(principais) > 1 else 'é o fator'} com relação mais forte com a "
+                     f"qualidade (|ρ| = {' e '.join(f'{forca[metrica]:.3f}' for metrica in principais)})")
+        itens.extend(f"{_rotulo_metrica(metrica)} tem relação significativa, porém mais fraca, com a qualidade "
+                     f"(|ρ| = {forca[metrica]:.3f})" for metrica in list(forca)[2:])
+    else:
+        itens.append("Nenhuma característica do processo de desenvolvimento mostrou relação significativa "
+                     "com a qualidade interna do código")
+    itens.extend(f"{_rotulo_metrica(metrica)} não está relacionada com a qualidade interna do código"
+                 for metrica in sem_relacao)
+    itens.append("As correlações indicam associação, não causalidade")
+    return [
+        {'tipo': 'titulo', 'nivel': 2, 'texto': 'CONCLUSÕES'},
+        {'tipo': 'lista', 'ordenada': True, 'itens': itens},
+    ]
+
+
+# Seções do relatório, na ordem do documento. entradas(analisador, df, correlations) retorna
+# os dados (serializáveis em JSON) de que a seção depende, ou None para omiti-la; construir
+# transforma essas entradas em blocos. A seção só é reconstruída quando as entradas mudam.
+SECOES_RELATORIO = [
+    dict(nome='resumo', entradas=_entradas_resumo, construir=_secao_resumo),
+    dict(nome='estatisticas', entradas=_entradas_estatisticas, construir=_secao_estatisticas),
+    dict(nome='questoes', entradas=_sem_entradas, construir=_secao_questoes),
+    *[dict(nome=questao['id'].lower(), entradas=_entradas_questao(questao), construir=_secao_questao)
+      for questao in QUESTOES_PESQUISA],
+    dict(nome='outras_correlacoes', entradas=_entradas_outras_correlacoes, construir=_secao_outras_correlacoes),
+    dict(nome='graficos', entradas=_entradas_graficos, construir=_secao_graficos),
+    dict(nome='discussao', entradas=_entradas_discussao, construir=_secao_discussao),
+    dict(nome='conclusoes', entradas=_entradas_discussao, construir=_secao_conclusoes),
+]
+
+
+def renderizar_relatorio_markdown(blocos, arquivo):
+    partes = []
+    for bloco in blocos:
+        tipo = bloco['tipo']
+        if tipo == 'titulo':
+            partes.append(f"{'#' * bloco['nivel']} {bloco['texto']}")
+        elif tipo == 'paragrafo':
+            partes.append(bloco['texto'])
+        elif tipo == 'lista':
+            marcadores = [f"{i}." for i in range(1, len(bloco['itens']) + 1)] if bloco.get('ordenada') \
+                else ['-'] * len(bloco['itens'])
+            partes.append("\n".join(f"{marcador} {item}" for marcador, item in zip(marcadores, bloco['itens'])))
+        elif tipo == 'tabela':
+            linhas = [bloco['colunas'], ['---'] * len(bloco['colunas'])] + bloco['linhas']
+            partes.append("\n".join("| " + " | ".join(linha) + " |" for linha in linhas))
+        elif tipo == 'imagem':
+            partes.append(f"![{bloco['legenda']}]({bloco['arquivo']})")
+    Path(arquivo).write_text("\n\n".join(partes) + "\n", encoding="utf-8")
+
+
+ESTILO_HTML = """
+body { font-family: 'DejaVu Sans', Arial, sans-serif; max-width: 960px; margin: 2em auto; color: #222; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+th { background: #f2f2f2; }
+figure { text-align: center; margin: 1.5em 0; }
+img { max-width: 80%; }
+"""
+
+
+def renderizar_relatorio_html(blocos, arquivo):
+    partes = []
+    for bloco in blocos:
+        tipo = bloco['tipo']
+        if tipo == 'titulo':
+            partes.append(f"<h{bloco['nivel']}>{html.escape(bloco['texto'])}</h{bloco['nivel']}>")
+        elif tipo == 'paragrafo':
+            partes.append(f"<p>{html.escape(bloco['texto'])}</p>")
+        elif tipo == 'lista':
+            marcador = 'ol' if bloco.get('ordenada') else 'ul'
+            itens = "".join(f"<li>{html.escape(item)}</li>" for item in bloco['itens'])
+            partes.append(f"<{marcador}>{itens}</{marcador}>")
+        elif tipo == 'tabela':
+            cabecalho = "".join(f"<th>{html.escape(coluna)}</th>" for coluna in bloco['colunas'])
+            linhas = "".join("<tr>" + "".join(f"<td>{html.escape(celula)}</td>" for celula in linha) + "</tr>"
+                             for linha in bloco['linhas'])
+            partes.append(f"<table><thead><tr>{cabecalho}</tr></thead><tbody>{linhas}</tbody></table>")
+        elif tipo == 'imagem':
+            legenda = html.escape(bloco['legenda'])
+            partes.append(f'<figure><img src="{html.escape(bloco["arquivo"])}" alt="{legenda}">'
+                          f'<figcaption>{legenda}</figcaption></figure>')
+    titulo = next((bloco['texto'] for bloco in blocos if bloco['tipo'] == 'titulo'), 'Relatório')
+    documento = (f'<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n'
+                 f'<title>{html.escape(titulo)}</title>\n<style>{ESTILO_HTML}</style>\n</head>\n<body>\n'
+                 + "\n".join(partes) + "\n</body>\n</html>\n")
+    Path(arquivo).write_text(documento, encoding="utf-8")
+
+
+def renderizar_relatorio_pdf(blocos, arquivo):
+    """
+    Renderiza o relatório em PDF (A4) com o matplotlib, sem dependências extras. Os gráficos
+    são embutidos a partir dos PNGs, resolvidos em relação ao diretório do relatório, e reduzidos
+    com o Pillow (dependência do matplotlib) a DPI_PDF antes de entrar na página.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from matplotlib.backends.backend_pdf import PdfPages
+    from PIL import Image
+    
+    largura, altura = 8.27, 11.69
+    margem_x, margem_y = 0.08, 0.06
+    tamanhos_titulo = {1: 15, 2: 12.5, 3: 11}
+    base = Path(arquivo).parent
+    
+    def altura_linha(tamanho):
+        return tamanho * 1.45 / (altura * 72)
+    
+    def caracteres_por_linha(tamanho):
+        return int((1 - 2 * margem_x) * largura * 72 / (tamanho * 0.55))
+    
+    with PdfPages(arquivo) as pdf:
+        estado = {'fig': None, 'y': 0.0}
+        
+        def nova_pagina():
+            if estado['fig'] is not None:
+                pdf.savefig(estado['fig'])
+                plt.close(estado['fig'])
+            estado['fig'] = plt.figure(figsize=(largura, altura))
+            estado['y'] = 1 - margem_y
+        
+        def reservar(espaco):
+            if estado['fig'] is None or estado['y'] - espaco < margem_y:
+                nova_pagina()
+        
+        def escrever(linhas, tamanho, recuo=0.0, **estilo):
+            passo = altura_linha(tamanho)
+            for linha in linhas:
+                reservar(passo)
+                estado['fig'].text(margem_x + recuo, estado['y'], linha, fontsize=tamanho, va='top', **estilo)
+                estado['y'] -= passo
+        
+        for bloco in blocos:
+            tipo = bloco['tipo']
+            if tipo == 'titulo':
+                tamanho = tamanhos_titulo.get(bloco['nivel'], 10)
+                reservar(altura_linha(tamanho) * 3)
+                estado['y'] -= altura_linha(tamanho) * 0.5
+                escrever(textwrap.wrap(bloco['texto'], caracteres_por_linha(tamanho)), tamanho,
+                         fontweight='bold', family='DejaVu Sans')
+            elif tipo == 'paragrafo':
+                escrever(textwrap.wrap(bloco['texto'], caracteres_por_linha(9.5)), 9.5, family='DejaVu Sans')
+            elif tipo == 'lista':
+                for i, item in enumerate(bloco['itens'], 1):
+                    marcador = f"{i}. " if bloco.get('ordenada') else "• "
+                    escrever(textwrap.wrap(item, caracteres_por_linha(9.5) - 4, initial_indent=marcador,
+                                           subsequent_indent=" " * len(marcador)), 9.5, recuo=0.02,
+                             family='DejaVu Sans')
+            elif tipo == 'tabela':
+                # Tabelas em fonte monoespaçada, com as colunas alinhadas pelo maior valor
+                linhas = [bloco['colunas']] + bloco['linhas']
+                larguras = [max(len(linha[i]) for linha in linhas) for i in range(len(bloco['colunas']))]
+                
+                def formatar(linha):
+                    return "  ".join(celula.ljust(larguras[i]) if i == 0 else celula.rjust(larguras[i])
+                                     for i, celula in enumerate(linha))
+                
+                tamanho = min(8.5, (1 - 2 * margem_x) * largura * 72 / (len(formatar(bloco['colunas'])) * 0.62))
+                estado['y'] -= altura_linha(tamanho) * 0.5
+                escrever([formatar(bloco['colunas']), "-" * len(formatar(bloco['colunas']))], tamanho,
+                         family='DejaVu Sans Mono', fontweight='bold')
+                escrever([formatar(linha) for linha in bloco['linhas']], tamanho, family='DejaVu Sans Mono')
+                estado['y'] -= altura_linha(tamanho) * 0.5
+            elif tipo == 'imagem':
+                caminho = base / bloco['arquivo']
+                if not caminho.exists():
+                    continue
+                largura_imagem = 0.6
+                # Um PNG de 300 DPI lido pelo plt.imread vira um array float RGBA de centenas de MB
+                with Image.open(caminho) as png:
+                    png.thumbnail((int(largura_imagem * largura * DPI_PDF), int(altura * DPI_PDF)))
+                    imagem = np.asarray(png.convert("RGB"))
+                altura_imagem = largura_imagem * imagem.shape[0] / imagem.shape[1] * largura / altura
+                reservar(altura_imagem + altura_linha(9) * 2)
+                eixo = estado['fig'].add_axes([(1 - largura_imagem) / 2, estado['y'] - altura_imagem,
+                                               largura_imagem, altura_imagem])
+                eixo.imshow(imagem)
+                eixo.axis('off')
+                estado['y'] -= altura_imagem + altura_linha(9) * 0.5
+                escrever([bloco['legenda']], 9, recuo=0.0, family='DejaVu Sans', style='italic')
+        
+        if estado['fig'] is None:
+            nova_pagina()
+        pdf.savefig(estado['fig'])
+        plt.close(estado['fig'])
+
+
+RENDERIZADORES_RELATORIO = {
+    'txt': renderizar_relatorio_markdown,
+    'md': renderizar_relatorio_markdown,
+    'html': renderizar_relatorio_html,
+    'pdf': renderizar_relatorio_pdf,
+}
+
+
+URL_GITHUB = "https://github.com"
+
+
+def iso_para_epoch(valor):
+    """
+    Converte uma data ISO 8601 da API do GitHub ('2015-01-01T00:00:00Z') em segundos desde a época
+    """
+    if valor in (None, ''):
+        return None
+    return int(datetime.fromisoformat(valor.replace('Z', '+00:00')).timestamp())
+
+
+def epoch_para_iso(epoch):
+    return None if epoch is None else time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+
+def _internar(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+def host_repositorio(clone_url, full_name):
+    """
+    Host de clone de um repositório ('https://github.com', o de um GitHub Enterprise, o de um
+    servidor de testes ou um diretório de repositórios bare), extraído do clone_url da API.
+    clone_url que não segue o formato <host>/<full_name>.git resulta no GitHub público.
+    """
+    sufixo = f"/{full_name}.git"
+    if clone_url and clone_url.endswith(sufixo):
+        return _internar(clone_url[:-len(sufixo)])
+    return URL_GITHUB
+
+
+class RegistroRepositorio(Mapping):
+    """
+    Repositório coletado, com __slots__ no lugar de um dict de 14 chaves por repositório: as datas
+    são convertidas uma única vez em epoch inteiro, linguagem e branch padrão são internados, e
+    name, clone_url e html_url são derivados de full_name sob demanda (com o host de clone
+    informado pela API, internado e compartilhado entre os registros).
+    Continua acessível como dict (repo['stars'], repo.get(...), dict(repo)), inclusive para
+    os campos do enriquecimento GraphQL, que só aparecem depois de preenchidos.
+    """
+
+    __slots__ = ('full_name', 'description', 'stars', 'forks', 'watchers', 'language', 'size',
+                 'criado_em', 'atualizado_em', 'age_years', 'default_branch', 'host',
+                 'releases_count', 'commits_count', 'java_share', 'enviado_em')
+
+    CHAVES = ('name', 'full_name', 'description', 'stars', 'forks', 'watchers', 'language', 'size',
+              'created_at', 'updated_at', 'age_years', 'default_branch', 'clone_url', 'html_url')
+    CHAVES_ENRIQUECIMENTO = ('releases_count', 'commits_count', 'java_share', 'pushed_at')
+    DATAS = {'created_at': 'criado_em', 'updated_at': 'atualizado_em', 'pushed_at': 'enviado_em'}
+
+    def __init__(self, full_name, description, stars, forks, watchers, language, size,
+                 criado_em, atualizado_em, age_years=None, default_branch=None, host=URL_GITHUB):
+        self.full_name = full_name
+        self.description = description
+        self.stars = stars
+        self.forks = forks
+        self.watchers = watchers
+        self.language = _internar(language)
+        self.size = size
+        self.criado_em = criado_em
+        self.atualizado_em = atualizado_em
+        if age_years is None:
+            age_years = round((time.time() - criado_em) // 86400 / 365.25, 2)
+        self.age_years = age_years
+        self.default_branch = _internar(default_branch)
+        self.host = host
+        self.releases_count = self.commits_count = self.java_share = self.enviado_em = None
+
+    @classmethod
+    def da_api(cls, repo):
+        """
+        Cria o registro a partir de um item da busca de repositórios da API
+        """
+        return cls(repo['full_name'], repo['description'], repo['stargazers_count'], repo['forks_count'],
+                   repo['watchers_count'], repo['language'], repo['size'], iso_para_epoch(repo['created_at']),
+                   iso_para_epoch(repo['updated_at']), default_branch=repo['default_branch'],
+                   host=host_repositorio(repo.get('clone_url'), repo['full_name']))
+
+    @property
+    def name(self):
+        return self.full_name.partition('/')[2]
+
+    @property
+    def clone_url(self):
+        return f"{self.host}/{self.full_name}.git"
+
+    @property
+    def html_url(self):
+        return f"{self.host}/{self.full_name}"
+
+    def bruto(self, chave):
+        """
+        Valor da chave sem conversão (datas como epoch, em vez de strings ISO), ou None
+        """
+        return getattr(self, self.DATAS.get(chave, chave))
+
+    def __getitem__(self, chave):
+        if chave in self.DATAS:
+            valor = getattr(self, self.DATAS[chave])
+            if valor is None and chave == 'pushed_at':
+                raise KeyError(chave)
+            return epoch_para_iso(valor)
+        if chave not in self.CHAVES and chave not in self.CHAVES_ENRIQUECIMENTO:
+            raise KeyError(chave)
+        valor = getattr(self, chave)
+        if valor is None and chave in self.CHAVES_ENRIQUECIMENTO:
+            raise KeyError(chave)
+        return valor
+
+    def __setitem__(self, chave, valor):
+        if chave in self.DATAS:
+            setattr(self, self.DATAS[chave], iso_para_epoch(valor))
+        elif chave in self.__slots__:
+            setattr(self, chave, valor)
+        else:
+            raise KeyError(chave)
+
+    def __iter__(self):
+        yield from self.CHAVES
+        for chave in self.CHAVES_ENRIQUECIMENTO:
+            if self.bruto(chave) is not None:
+                yield chave
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"RegistroRepositorio({self.full_name!r}, stars={self.stars})"
+
+
+class LinhaDataset(Mapping):
+    """
+    Linha do dataset de análise: uma visão sobre o registro do repositório e as métricas do CK
+    (ou estimadas), sem copiar os campos para um novo dict. As chaves seguem a ordem das colunas
+    de dataset/dataset_repositorios_analise.csv, e as estatísticas adicionais do CK vêm no final.
+    """
+
+    __slots__ = ('repo', 'loc', 'comments', 'releases_count', 'metricas')
+
+    INICIO = ('repo_name', 'full_name', 'description', 'stars', 'forks', 'watchers', 'age_years', 'size_kb',
+              'loc', 'comments', 'releases_count', 'commits_count', 'java_share', 'pushed_at')
+    FIM = ('language', 'created_at', 'updated_at', 'clone_url', 'html_url')
+    ORDEM = INICIO + tuple(COLUNAS_CK) + FIM
+    FIXAS = frozenset(ORDEM)
+    # Colunas de valores_brutos(): todas menos as derivadas de full_name
+    COLUNAS_BRUTAS = tuple(chave for chave in ORDEM if chave not in ('repo_name', 'clone_url', 'html_url'))
+    CHAVES_REPO = {'repo_name': 'name', 'size_kb': 'size'}
+
+    def __init__(self, repo, loc, comments, releases_count, metricas):
+        self.repo = repo
+        self.loc = loc
+        self.comments = comments
+        self.releases_count = releases_count
+        self.metricas = metricas
+
+    def __getitem__(self, chave):
+        if chave in ('loc', 'comments', 'releases_count'):
+            return getattr(self, chave)
+        if chave in self.metricas and (chave in COLUNAS_CK or chave not in self.FIXAS):
+            return self.metricas[chave]
+        if chave not in self.FIXAS:
+            raise KeyError(chave)
+        return self.repo.get(self.CHAVES_REPO.get(chave, chave))
+
+    def __iter__(self):
+        yield from self.ORDEM
+        for chave in self.metricas:
+            if chave not in self.FIXAS:
+                yield chave
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def valores_brutos(self):
+        """
+        Valores das COLUNAS_BRUTAS lidos direto dos atributos do registro, com as datas como
+        epoch (requer um RegistroRepositorio)
+        """
+        repo = self.repo
+        return (repo.full_name, repo.description, repo.stars, repo.forks, repo.watchers, repo.age_years,
+                repo.size, self.loc, self.comments, self.releases_count, repo.commits_count, repo.java_share,
+                repo.enviado_em, *map(self.metricas.__getitem__, COLUNAS_CK), repo.language, repo.criado_em,
+                repo.atualizado_em)
+
+    def extras(self):
+        """
+        Estatísticas adicionais do CK (média, p90, número de classes, SHA...)
+        """
+        return ((chave, valor) for chave, valor in self.metricas.items() if chave not in self.FIXAS)
+
+
+class TabelaRepositorios:
+    """
+    Acumula linhas (LinhaDataset, RegistroRepositorio ou dicts) em colunas: arrays tipados para
+    os números, listas de strings internadas para as categorias e epochs para as datas, em vez de
+    uma lista de dicts. dataframe() entrega as colunas ao pandas sem montar um objeto por linha;
+    name, repo_name, clone_url e html_url são derivados de full_name (e do host de clone de cada
+    linha) na própria conversão.
+    """
+
+    CATEGORICAS = ('language', 'default_branch')
+    DATAS = ('created_at', 'updated_at', 'pushed_at')
+    DERIVADAS = ('name', 'repo_name', 'clone_url', 'html_url')
+
     def __init__(self):
-        self.output_dir = "resultados"
+        self.colunas = {}
+        self.derivadas = set()
+        self.ordem = []
+        self.hosts = []
+        self.total = 0
+        self._colunas_brutas = None
+
+    def __len__(self):
+        return self.total
+
+    def _itens(self, linha):
+        obter = linha.bruto if isinstance(linha, RegistroRepositorio) else linha.__getitem__
+        for chave in linha:
+            if chave in self.DERIVADAS:
+                yield chave, None
+                continue
+            valor = obter(chave)
+            if chave in self.DATAS and isinstance(valor, str):
+                valor = iso_para_epoch(valor)
+            elif chave in self.CATEGORICAS:
+                valor = _internar(valor)
+            yield chave, valor
+
+    def _nova_coluna(self, chave, valor):
+        """
+        Cria a coluna com o tipo do seu primeiro valor: array('q') para inteiros, array('d')
+        para floats e lista para o resto; linhas anteriores que não tinham a coluna ficam ausentes
+        """
+        self.ordem.append(chave)
+        if self.total or valor is None or isinstance(valor, bool):
+            coluna = [None] * self.total
+        elif isinstance(valor, int):
+            coluna = array('q')
+        elif isinstance(valor, float):
+            coluna = array('d')
+        else:
+            coluna = []
+        self.colunas[chave] = coluna
+        return coluna
+
+    def _anexar(self, chave, valor):
+        if chave in self.DERIVADAS:
+            if chave not in self.derivadas:
+                self.derivadas.add(chave)
+                self.ordem.append(chave)
+            return 0
+        coluna = self.colunas.get(chave)
+        if coluna is None:
+            coluna = self._nova_coluna(chave, valor)
+        try:
+            coluna.append(valor)
+        except TypeError:
+            # Inteiros que recebem um float viram array('d'); valores ausentes ou textos, lista
+            if isinstance(valor, float) and coluna.typecode == 'q':
+                coluna = array('d', coluna)
+            else:
+                coluna = coluna.tolist()
+            coluna.append(valor)
+            self.colunas[chave] = coluna
+            self._colunas_brutas = None
+        return 1
+
+    def _anexar_brutas(self, valores):
+        if self._colunas_brutas is None:
+            primeiros = dict(zip(LinhaDataset.COLUNAS_BRUTAS, valores))
+            for chave in LinhaDataset.ORDEM:
+                if chave in self.DERIVADAS:
+                    self._anexar(chave, None)
+                elif chave not in self.colunas:
+                    self._nova_coluna(chave, primeiros[chave])
+            self._colunas_brutas = [self.colunas[chave] for chave in LinhaDataset.COLUNAS_BRUTAS]
+        try:
+            for coluna, valor in zip(self._colunas_brutas, valores):
+                coluna.append(valor)
+        except TypeError:
+            for chave, valor in zip(LinhaDataset.COLUNAS_BRUTAS, valores):
+                if len(self.colunas[chave]) == self.total:
+                    self._anexar(chave, valor)
+
+    def adicionar(self, linha):
+        preenchidas = 0
+        if isinstance(linha, LinhaDataset) and isinstance(linha.repo, RegistroRepositorio):
+            self._anexar_brutas(linha.valores_brutos())
+            self.hosts.append(linha.repo.host)
+            preenchidas = len(LinhaDataset.COLUNAS_BRUTAS)
+            itens = linha.extras()
+        else:
+            linha = linha if isinstance(linha, Mapping) else dict(linha)
+            self.hosts.append(linha.host if isinstance(linha, RegistroRepositorio)
+                              else host_repositorio(linha.get('clone_url'), linha.get('full_name')))
+            itens = self._itens(linha)
+        for chave, valor in itens:
+            preenchidas += self._anexar(chave, valor)
+        self.total += 1
+        if preenchidas == len(self.colunas):
+            return
+        for chave, coluna in self.colunas.items():
+            if len(coluna) < self.total:
+                if isinstance(coluna, array):
+                    coluna = self.colunas[chave] = coluna.tolist()
+                    self._colunas_brutas = None
+                coluna.append(None)
+
+    def dataframe(self):
+        import numpy as np
+        import pandas as pd
+
+        nomes = self.colunas.get('full_name', [])
+        dados = {}
+        for chave in self.ordem:
+            coluna = self.colunas.get(chave)
+            if chave in ('name', 'repo_name'):
+                dados[chave] = [nome.partition('/')[2] for nome in nomes]
+            elif chave in ('clone_url', 'html_url'):
+                sufixo = ".git" if chave == 'clone_url' else ""
+                dados[chave] = [f"{host}/{nome}{sufixo}" for host, nome in zip(self.hosts, nomes)]
+            elif chave in self.DATAS:
+                dados[chave] = pd.to_datetime(pd.array(coluna, dtype="Int64"), unit='s', utc=True)
+            elif isinstance(coluna, array):
+                dados[chave] = np.frombuffer(coluna, dtype=np.int64 if coluna.typecode == 'q' else np.float64)
+            elif chave in self.CATEGORICAS:
+                dados[chave] = pd.Categorical(coluna)
+            else:
+                dados[chave] = coluna
+        return pd.DataFrame(dados, index=pd.RangeIndex(self.total))
+
+
+# Colunas do dataset resumido de métricas CK
+COLUNAS_DATASET_METRICAS_CK = ['repo_name', 'full_name', 'stars', 'age_years', 'loc', 'comments',
+                               'releases_count', 'cbo', 'dit', 'lcom', 'wmc', 'rfc']
+# Colunas fixas do dataset completo: as do enriquecimento GraphQL existem mesmo quando o
+# primeiro repositório gravado não foi enriquecido
+COLUNAS_DATASET_COMPLETO = list(RegistroRepositorio.CHAVES + RegistroRepositorio.CHAVES_ENRIQUECIMENTO)
+
+
+class EscritorCSVIncremental:
+    """
+    Grava linhas (dicts) em um CSV em lotes, à medida que chegam. O cabeçalho é definido
+    pela primeira linha (ou por colunas). As linhas vão para <caminho>.tmp, que só substitui
+    o CSV ao fechar sem erro e com ao menos uma linha: uma execução que falha (ou não coleta
+    nada) preserva o arquivo anterior, que pode inclusive ser a entrada da própria execução.
+    """
+
+    def __init__(self, caminho, colunas=None, tamanho_lote=50):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.caminho = caminho
+        self.colunas = colunas
+        self.tamanho_lote = tamanho_lote
+        self.total = 0
+        self._pendentes = []
+        self._temporario = f"{caminho}.tmp"
+        self._arquivo = open(self._temporario, "w", newline="", encoding="utf-8")
+        self._writer = None
+
+    def escrever(self, linha):
+        self._pendentes.append(linha)
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.descarregar()
+
+    def descarregar(self):
+        if not self._pendentes:
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._arquivo, fieldnames=self.colunas or list(self._pendentes[0]),
+                                          extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerows(self._pendentes)
+        self._arquivo.flush()
+        self.total += len(self._pendentes)
+        self._pendentes = []
+
+    def fechar(self):
+        self.descarregar()
+        self._arquivo.close()
+        if self.total == 0 and os.path.exists(self.caminho):
+            print(f"⚠️  Nenhuma linha gravada; {self.caminho} mantido")
+            os.remove(self._temporario)
+            return
+        os.replace(self._temporario, self.caminho)
+
+    def descartar(self):
+        """
+        Fecha sem substituir o CSV, descartando as linhas gravadas
+        """
+        self._arquivo.close()
+        os.remove(self._temporario)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.fechar()
+        else:
+            self.descartar()
+
+
+class AnalisadorQualidadeJava:
+    def __init__(self, base_url="https://api.github.com", token=None, max_concorrencia=4,
+                 usar_cache=True, cache_ttl=24 * 3600, ck_jar=None, ck_comando=None,
+                 workers_clone=4, workers_ck=2, workers_parse=None, perfilar=None,
+                 consulta="language:java", output_dir="resultados", dataset_dir="dataset"):
+        # Estudo: consulta de busca, extrator de métricas (ck_comando) e destino dos arquivos
+        self.estudo = None
+        self.consulta = consulta
+        self.extensoes = (".java",)
+        self.output_dir = output_dir
+        self.dataset_dir = dataset_dir
         os.makedirs(self.output_dir, exist_ok=True)
         
         # Configuração da API do GitHub
-        self.base_url = "https://api.github.com"
+        self.base_url = base_url.rstrip("/")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "Java-Quality-Analysis/1.0"
         }
-        self.repos_data = []
-        
-        # Diretório para clones temporários
-        self.temp_clones_dir = Path("temp_clones")
-        self.temp_clones_dir.mkdir(exist_ok=True)
+        token = token or os.environ.get("GITHUB_TOKEN")
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.repos_data = []
+        
+        # Sessão HTTP criada no primeiro uso (ver a propriedade session)
+        self.max_concorrencia = max_concorrencia
+        self._session = None
+        self._lock_session = threading.Lock()
+        self.rate_limit = ControladorRateLimit()
+        self.custo_graphql = 0
+        self._lock_graphql = threading.Lock()
+        
+        # Instrumentação por etapa e por repositório (PERFILAR_ETAPAS=correlacoes,graficos ativa o perfil)
+        if perfilar is None and os.environ.get("PERFILAR_ETAPAS"):
+            perfilar = os.environ["PERFILAR_ETAPAS"].split(",")
+        self.instrumentacao = Instrumentacao(f"{self.output_dir}/instrumentacao.jsonl", perfilar,
+                                             fonte_espera=lambda: self.rate_limit.tempo_espera_total,
+                                             dir_perfis=f"{self.output_dir}/perfis")
+        
+        # Diretório para clones temporários (criado pelo PipelineCK)
+        self.temp_clones_dir = Path("temp_clones")
+        
+        # Ferramenta CK: comando com os marcadores {projeto} e {saida}
+        ck_jar = ck_jar or os.environ.get("CK_JAR")
+        if ck_comando is None and ck_jar:
+            ck_comando = ["java", "-jar", str(ck_jar), "{projeto}", "false", "0", "false", "{saida}/"]
+        self.ck_comando = ck_comando
+        self.workers_clone = workers_clone
+        self.workers_ck = workers_ck
+        self.workers_parse = workers_parse
+        self.pipeline_ck = None
+        
+        # Cache de respostas da API e resultados do CK por full_name + SHA (para execuções
+        # incrementais e retomáveis), abertos no primeiro uso: report, plot e correlate não os criam
+        self.usar_cache = usar_cache
+        self.cache_ttl = cache_ttl
+        self._cache = None
+        self._armazem_ck = None
+        self._lock_recursos = threading.Lock()
+        
+        # Métricas por classe em Parquet particionado por repositório (requer pyarrow)
+        self.dir_classes_ck = Path(self.dataset_dir) / "classes_ck" if pyarrow_disponivel() else None
+    
+    @property
+    def session(self):
+        """
+        Sessão HTTP com pool de conexões compartilhado entre as threads de coleta.
+        É criada no primeiro uso, para que o requests só seja importado quando há acesso à rede.
+        """
+        with self._lock_session:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=self.max_concorrencia, pool_maxsize=self.max_concorrencia)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+        return self._session
+    
+    @property
+    def cache(self):
+        """
+        Cache persistente das respostas da API (None com usar_cache=False), aberto no primeiro uso
+        """
+        if not self.usar_cache:
+            return None
+        with self._lock_recursos:
+            if self._cache is None:
+                self._cache = CacheRespostasHTTP(ttl=self.cache_ttl)
+        return self._cache
+    
+    @property
+    def armazem_ck(self):
+        """
+        Armazém de resultados do CK deste estudo, aberto no primeiro uso
+        """
+        with self._lock_recursos:
+            if self._armazem_ck is None:
+                self._armazem_ck = ArmazemResultadosCK(f"{self.dataset_dir}/resultados_ck.sqlite")
+        return self._armazem_ck
+    
+    def _requisitar_github(self, url, params=None, max_tentativas=5, corpo=None):
+        """
+        Executa um GET (ou um POST com corpo JSON, para o GraphQL) na API do GitHub
+        respeitando o rate limit informado pelos cabeçalhos
+        """
+        import requests
+        
+        chave = entrada = None
+        cache = self.cache
+        if cache is not None:
+            chave = CacheRespostasHTTP.chave(url, params if corpo is None else {"corpo": json.dumps(corpo, sort_keys=True)})
+            entrada = cache.obter(chave)
+            if entrada is not None and entrada[2]:
+                return entrada[1]
+        headers = {"If-None-Match": entrada[0]} if entrada is not None and entrada[0] else None
+        
+        # A busca, o GraphQL e os demais endpoints REST têm cotas separadas no GitHub
+        recurso = "graphql" if corpo is not None else "search" if "/search/" in url else "core"
+        tentativa = 0
+        while True:
+            self.rate_limit.aguardar(self.estudo, recurso)
+            try:
+                if corpo is None:
+                    response = self.session.get(url, params=params, headers=headers, timeout=30)
+                else:
+                    response = self.session.post(url, json=corpo, headers=headers, timeout=60)
+            except requests.exceptions.RequestException as e:
+                tentativa += 1
+                if tentativa >= max_tentativas:
+                    raise
+                print(f"❌ Erro na requisição: {e}")
+                time.sleep(min(60, 2 ** tentativa))
+                continue
+            
+            self.instrumentacao.registrar_bytes(len(response.content))
+            if self.rate_limit.atualizar(response, recurso):
+                print("⚠️  Rate limit atingido. Aguardando liberação da cota...")
+                continue
+            
+            if response.status_code in (403, 429, 502, 503) and tentativa + 1 < max_tentativas:
+                # Limite secundário ou falha transitória sem cabeçalhos de agendamento
+                tentativa += 1
+                time.sleep(min(60, 2 ** tentativa))
+                continue
+            
+            if response.status_code == 304 and entrada is not None:
+                cache.renovar(chave)
+                return entrada[1]
+            
+            response.raise_for_status()
+            data = response.json()
+            if cache is not None:
+                cache.salvar(chave, response.headers.get("ETag"), data)
+            return data
+    
+    def _buscar_pagina(self, consulta, page, per_page=100):
+        """
+        Busca uma página da pesquisa de repositórios ordenada por estrelas
+        """
+        params = {
+            "q": consulta,
+            "sort": "stars",
+            "order": "desc",
+            "per_page": per_page,
+            "page": page
+        }
+        return self._requisitar_github(f"{self.base_url}/search/repositories", params)
     
-    def coletar_repositorios_github(self, max_repos=1000):
+    def iterar_repositorios_github(self, max_repos=1000, consulta=None):
         """
-        METODOLOGIA - Seleção de Repositórios:
-        Consome a API do GitHub para coletar os top-1.000 repositórios Java mais populares
+        Gera os repositórios da busca na ordem de popularidade, buscando as páginas
+        concorrentemente (até max_concorrencia requisições simultâneas)
         """
-        print(f"🌐 Coletando os top-{max_repos} repositórios Java mais populares via GitHub API...")
+        import requests
         
-        page = 1
-        total_collected = 0
+        consulta = consulta or self.consulta
         per_page = 100
+        total_paginas = -(-max_repos // per_page)
+        total_collected = 0
         
-        while total_collected < max_repos:
-            # Busca repositórios Java ordenados por estrelas
-            url = f"{self.base_url}/search/repositories"
-            params = {
-                "q": "language:java",
-                "sort": "stars",
-                "order": "desc",
-                "per_page": min(per_page, max_repos - total_collected),
-                "page": page
-            }
-            
-            try:
-                response = requests.get(url, headers=self.headers, params=params)
-                
-                if response.status_code == 403:
-                    print("⚠️  Rate limit atingido. Aguardando 60 segundos...")
-                    time.sleep(60)
-                    continue
-                    
-                response.raise_for_status()
-                data = response.json()
+        paginas = ((consulta, page, per_page) for page in range(1, total_paginas + 1))
+        with contextlib.closing(self._iterar_paginas(paginas)) as futuros:
+            for futuro in futuros:
+                try:
+                    data = futuro.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Erro na requisição: {e}")
+                    break
                 
                 if not data.get('items'):
                     print("⚠️  Nenhum repositório encontrado nesta página")
                     break
-                    
+                
                 for repo in data['items']:
                     if total_collected >= max_repos:
                         break
-                        
-                    repo_info = self.extrair_info_repositorio(repo)
-                    self.repos_data.append(repo_info)
                     total_collected += 1
-                    
-                page += 1
-                
-                # Rate limiting - GitHub permite 60 requests por hora sem autenticação
-                time.sleep(1)
+                    yield self.extrair_info_repositorio(repo)
                 
                 print(f"📊 Coletados {total_collected} repositórios...")
+    
+    def _iterar_paginas(self, paginas):
+        """
+        Busca as páginas (consulta, page, per_page) e gera os futuros na ordem de paginas.
+        No máximo max_concorrencia páginas ficam em andamento: a próxima só é pedida quando
+        uma é entregue, e cada futuro é descartado ao ser consumido, então a memória não
+        cresce com o total de páginas nem quando o consumidor (o CK) é mais lento que a coleta.
+        """
+        paginas = iter(paginas)
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            em_andamento = deque(executor.submit(self._buscar_pagina, *pagina)
+                                 for pagina in itertools.islice(paginas, self.max_concorrencia))
+            try:
+                while em_andamento:
+                    futuro = em_andamento.popleft()
+                    for pagina in itertools.islice(paginas, 1):
+                        em_andamento.append(executor.submit(self._buscar_pagina, *pagina))
+                    yield futuro
+                    del futuro
+            finally:
+                for futuro in em_andamento:
+                    futuro.cancel()
+    
+    @staticmethod
+    def _qualificadores_shard(shard):
+        """
+        Converte um shard (estrelas_min, estrelas_max, intervalo_criacao) em qualificadores da busca
+        """
+        estrelas_min, estrelas_max, criacao = shard
+        qualificadores = f"stars:{estrelas_min}..{estrelas_max}"
+        if criacao:
+            qualificadores += f" created:{criacao[0].isoformat()}..{criacao[1].isoformat()}"
+        return qualificadores
+    
+    def _contar_resultados(self, consulta, shard):
+        """
+        Obtém o total_count de um shard com uma requisição de um único item
+        """
+        data = self._buscar_pagina(f"{consulta} {self._qualificadores_shard(shard)}", 1, per_page=1)
+        return data.get('total_count', 0)
+    
+    @staticmethod
+    def _dividir_shard(shard, total, dividir_por_data=True, max_partes=None):
+        """
+        Divide um shard acima do limite da busca em partes proporcionais ao total reportado
+        (no máximo max_partes). Faixas de estrelas são cortadas em escala geométrica (a
+        distribuição é de cauda longa); uma faixa de um único valor de estrelas é dividida por
+        data de criação.
+        """
+        estrelas_min, estrelas_max, criacao = shard
+        partes = -(-total // LIMITE_RESULTADOS_BUSCA) + 1
+        if max_partes is not None:
+            partes = min(partes, max_partes)
+        
+        if criacao is None and estrelas_min < estrelas_max:
+            base = max(estrelas_min, 1)
+            cortes = sorted({
+                int(round(base * (estrelas_max / base) ** (i / partes))) for i in range(1, partes)
+            })
+            cortes = [c for c in cortes if estrelas_min <= c < estrelas_max] or [(estrelas_min + estrelas_max) // 2]
+            novos = []
+            inicio = estrelas_min
+            for corte in cortes + [estrelas_max]:
+                if corte >= inicio:
+                    novos.append((inicio, corte, None))
+                    inicio = corte + 1
+            return novos
+        
+        if not dividir_por_data:
+            return []
+        
+        inicio, fim = criacao or (INICIO_GITHUB, date.today())
+        dias = (fim - inicio).days
+        if dias < 1:
+            return []
+        passo = max(1, dias // partes)
+        novos = []
+        while inicio <= fim:
+            parte_fim = min(fim, inicio + timedelta(days=passo - 1))
+            novos.append((estrelas_min, estrelas_max, (inicio, parte_fim)))
+            inicio = parte_fim + timedelta(days=1)
+        return novos
+    
+    def planejar_shards(self, consulta=None, estrelas_min=0, estrelas_max=None,
+                        dividir_por_data=True, max_repos=None):
+        """
+        Divide a consulta em faixas de estrelas (e, se necessário, de data de criação) cujo
+        total_count fica abaixo do limite de 1.000 resultados da busca.
+        O planejamento desce a partir das faixas com mais estrelas e para assim que os shards
+        prontos somam max_repos: as faixas de poucas estrelas, que não seriam coletadas, não
+        são contadas nem divididas.
+        Retorna uma lista de (shard, total) em ordem decrescente de estrelas.
+        """
+        consulta = consulta or self.consulta
+        if estrelas_max is None:
+            topo = self._buscar_pagina(consulta, 1, per_page=1).get('items')
+            if not topo:
+                return []
+            estrelas_max = topo[0]['stargazers_count']
+        
+        # Fila em ordem decrescente de estrelas; total None indica um shard ainda não contado.
+        # Com max_repos, os shards são divididos em poucas partes por vez: só o topo da faixa
+        # é refinado, em vez de contar centenas de faixas finas que não serão coletadas.
+        max_partes = None if max_repos is None else PARTES_POR_DIVISAO
+        fila = [((estrelas_min, estrelas_max, None), None)]
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            while True:
+                # Conta os primeiros shards pendentes dentre os necessários para chegar a max_repos
+                acumulado, pendentes = 0, []
+                for posicao, (shard, total) in enumerate(fila):
+                    if max_repos is not None and acumulado >= max_repos:
+                        break
+                    if total is None:
+                        pendentes.append(posicao)
+                        if len(pendentes) == self.max_concorrencia:
+                            break
+                    else:
+                        acumulado += total
+                if not pendentes:
+                    break
                 
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Erro na requisição: {e}")
-                time.sleep(5)
-                continue
+                totais = executor.map(lambda posicao: self._contar_resultados(consulta, fila[posicao][0]), pendentes)
+                substituicoes = {}
+                for posicao, total in zip(pendentes, totais):
+                    shard = fila[posicao][0]
+                    if total == 0:
+                        substituicoes[posicao] = []
+                    elif total <= LIMITE_RESULTADOS_BUSCA:
+                        substituicoes[posicao] = [(shard, total)]
+                    else:
+                        partes = self._dividir_shard(shard, total, dividir_por_data, max_partes)
+                        if partes:
+                            substituicoes[posicao] = [(parte, None) for parte in reversed(partes)]
+                        else:
+                            print(f"⚠️  Shard {self._qualificadores_shard(shard)} tem {total} resultados "
+                                  f"e não pode ser dividido; apenas {LIMITE_RESULTADOS_BUSCA} serão coletados")
+                            substituicoes[posicao] = [(shard, LIMITE_RESULTADOS_BUSCA)]
+                fila = [item for posicao, original in enumerate(fila)
+                        for item in substituicoes.get(posicao, [original])]
+        
+        # Funde faixas de estrelas consecutivas na fila enquanto a soma couber em um único shard;
+        # as faixas vazias entre elas já foram contadas e descartadas, então a união não perde nada
+        fundidos = []
+        acumulado = 0
+        for shard, total in fila:
+            if total is None or (max_repos is not None and acumulado >= max_repos):
+                break
+            acumulado += total
+            if fundidos:
+                (anterior, total_anterior) = fundidos[-1]
+                if (anterior[2] is None and shard[2] is None
+                        and total_anterior + total <= LIMITE_RESULTADOS_BUSCA):
+                    fundidos[-1] = ((shard[0], anterior[1], None), total_anterior + total)
+                    continue
+            fundidos.append((shard, total))
+        return fundidos
+    
+    def iterar_repositorios_sharded(self, max_repos=None, consulta=None,
+                                    estrelas_min=0, dividir_por_data=True):
+        """
+        Coleta além do limite de 1.000 resultados executando os shards em paralelo.
+        Os repositórios são gerados em ordem decrescente de estrelas, sem duplicatas de
+        full_name, e cada shard só tem buscadas as páginas necessárias para chegar a max_repos.
+        """
+        import requests
+        
+        consulta = consulta or self.consulta
+        shards = self.planejar_shards(consulta, estrelas_min, dividir_por_data=dividir_por_data, max_repos=max_repos)
+        total_estimado = sum(total for _, total in shards)
+        print(f"🧩 {len(shards)} shards planejados (~{total_estimado} repositórios)")
+        
+        per_page = 100
+        paginas = []
+        restante = max_repos if max_repos is not None else float('inf')
+        for shard, total in shards:
+            necessarios = min(total, LIMITE_RESULTADOS_BUSCA, restante)
+            restante -= necessarios
+            paginas.extend((f"{consulta} {self._qualificadores_shard(shard)}", page, per_page)
+                           for page in range(1, -(-necessarios // per_page) + 1))
+        
+        vistos = set()
+        with contextlib.closing(self._iterar_paginas(paginas)) as futuros:
+            for futuro in futuros:
+                try:
+                    data = futuro.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Erro na requisição: {e}")
+                    continue
+                
+                for repo in data.get('items', []):
+                    if repo['full_name'] in vistos:
+                        continue
+                    vistos.add(repo['full_name'])
+                    yield self.extrair_info_repositorio(repo)
+                    if max_repos is not None and len(vistos) >= max_repos:
+                        return
                 
+                print(f"📊 Coletados {len(vistos)} repositórios...")
+    
+    @staticmethod
+    def _consulta_graphql_lote(repos):
+        """
+        Monta uma consulta GraphQL com um alias por repositório do lote
+        """
+        campos = []
+        for i, repo in enumerate(repos):
+            owner, name = repo['full_name'].split('/', 1)
+            campos.append(f"""
+  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{
+    releases {{ totalCount }}
+    pushedAt
+    defaultBranchRef {{ target {{ ... on Commit {{ history {{ totalCount }} }} }} }}
+    languages(first: 10, orderBy: {{field: SIZE, direction: DESC}}) {{
+      totalSize
+      edges {{ size node {{ name }} }}
+    }}
+  }}""")
+        return "query {\n  rateLimit { cost remaining resetAt }" + "".join(campos) + "\n}"
+    
+    def _enriquecer_lote(self, repos):
+        """
+        Preenche releases_count, commits_count, java_share e pushed_at de um lote de repositórios
+        com uma única consulta GraphQL
+        """
+        with self.instrumentacao.etapa("graphql_lote"):
+            resposta = self._requisitar_github(f"{self.base_url}/graphql",
+                                               corpo={"query": self._consulta_graphql_lote(repos)})
+        data = resposta.get('data') or {}
+        
+        custo = data.get('rateLimit') or {}
+        with self._lock_graphql:
+            self.custo_graphql += custo.get('cost', 0)
+        
+        for i, repo in enumerate(repos):
+            info = data.get(f"r{i}")
+            if not info:
+                continue
+            repo['releases_count'] = info['releases']['totalCount']
+            repo['pushed_at'] = info['pushedAt']
+            
+            alvo = (info.get('defaultBranchRef') or {}).get('target') or {}
+            repo['commits_count'] = (alvo.get('history') or {}).get('totalCount')
+            
+            linguagens = info['languages']
+            bytes_java = sum(aresta['size'] for aresta in linguagens['edges'] if aresta['node']['name'] == 'Java')
+            repo['java_share'] = round(bytes_java / linguagens['totalSize'], 4) if linguagens['totalSize'] else 0.0
+        
+        if resposta.get('errors'):
+            print(f"⚠️  GraphQL retornou {len(resposta['errors'])} erros no lote (repositórios ignorados)")
+        return repos
+    
+    def iterar_enriquecidos_graphql(self, repos, tamanho_lote=50):
+        """
+        Enriquece os repositórios em lotes de consultas GraphQL com aliases (releases, commits
+        do branch padrão, fração de bytes Java e último push): ~20 requisições para 1.000
+        repositórios em vez de uma ou mais por repositório. Os lotes são consultados em paralelo
+        e os repositórios seguem em fluxo, na ordem de chegada.
+        """
+        import requests
+        
+        if "Authorization" not in self.headers:
+            print("⚠️  A API GraphQL exige GITHUB_TOKEN; enriquecimento ignorado")
+            yield from repos
+            return
+        
+        repos = iter(repos)
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            pendentes = []
+            while True:
+                lote = list(itertools.islice(repos, tamanho_lote))
+                if lote:
+                    pendentes.append((executor.submit(self._enriquecer_lote, lote), lote))
+                # Mantém no máximo max_concorrencia lotes em andamento, preservando a ordem
+                while pendentes and (not lote or len(pendentes) >= self.max_concorrencia or pendentes[0][0].done()):
+                    futuro, lote_pendente = pendentes.pop(0)
+                    try:
+                        enriquecidos = futuro.result()
+                    except requests.exceptions.RequestException as e:
+                        # O lote segue sem enriquecimento em vez de sair do dataset
+                        print(f"❌ Erro na consulta GraphQL: {e}")
+                        enriquecidos = lote_pendente
+                    yield from enriquecidos
+                if not lote and not pendentes:
+                    break
+        print(f"🧮 Custo GraphQL acumulado: {self.custo_graphql} pontos "
+              f"(restantes: {self.rate_limit.janela('graphql').restantes})")
+    
+    def coletar_repositorios_github(self, max_repos=1000, sharding=None):
+        """
+        METODOLOGIA - Seleção de Repositórios:
+        Consome a API do GitHub para coletar os top-1.000 repositórios Java mais populares.
+        Acima de 1.000 repositórios (ou com sharding=True) a busca é dividida em faixas de estrelas.
+        """
+        print(f"🌐 Coletando os top-{max_repos} repositórios Java mais populares via GitHub API...")
+        
+        if sharding is None:
+            sharding = max_repos > LIMITE_RESULTADOS_BUSCA
+        repos = (self.iterar_repositorios_sharded(max_repos) if sharding
+                 else self.iterar_repositorios_github(max_repos))
+        for repo_info in repos:
+            self.repos_data.append(repo_info)
+        
         print(f"✅ Coleta concluída! Total de repositórios: {len(self.repos_data)}")
         return self.repos_data
     
@@ -119,283 +2666,428 @@ class AnalisadorQualidadeJava:
         """
         Extrai informações relevantes de um repositório da API do GitHub
         """
-        created_at = datetime.strptime(repo['created_at'], '%Y-%m-%dT%H:%M:%SZ')
-        updated_at = datetime.strptime(repo['updated_at'], '%Y-%m-%dT%H:%M:%SZ')
-        age_years = (datetime.now() - created_at).days / 365.25
+        return RegistroRepositorio.da_api(repo)
+    
+    def _estimar_metricas_ck(self, repo, loc):
+        """
+        Estimativa das métricas CK a partir de dados da API, usada apenas quando a
+        ferramenta CK não está configurada
+        """
+        stars = repo['stars']
+        age_years = repo['age_years']
+        
+        # Métricas CK baseadas em fatores reais
+        complexity_factor = min(loc / 50000, 3.0)
+        popularity_factor = min(stars / 10000, 5.0)
+        
+        # CBO (Coupling Between Objects) - baseado em complexidade e popularidade
+        cbo = max(1, min(25, 2 + complexity_factor * 4 + popularity_factor * 0.5 + random.uniform(-2, 2)))
+        
+        # DIT (Depth of Inheritance Tree) - baseado em maturidade
+        dit = max(0, min(8, 1 + complexity_factor * 2 + age_years * 0.3 + random.uniform(-0.5, 0.5)))
+        
+        # LCOM (Lack of Cohesion of Methods) - baseado em tamanho
+        lcom = max(0, min(1, 0.2 + complexity_factor * 0.3 + random.uniform(-0.1, 0.1)))
+        
+        # Métricas adicionais CK
+        wmc = int(10 + complexity_factor * 30 + popularity_factor * 5 + random.uniform(-5, 10))
+        rfc = int(5 + complexity_factor * 25 + random.uniform(-3, 8))
+        lcom3 = max(0, min(1, lcom + random.uniform(-0.05, 0.05)))
+        ca = int(1 + complexity_factor * 8 + popularity_factor * 2 + random.uniform(-2, 3))
+        ce = int(1 + complexity_factor * 12 + random.uniform(-3, 4))
+        npm = int(3 + complexity_factor * 15 + random.uniform(-2, 5))
         
         return {
-            'name': repo['name'],
-            'full_name': repo['full_name'],
-            'description': repo['description'],
-            'stars': repo['stargazers_count'],
-            'forks': repo['forks_count'],
-            'watchers': repo['watchers_count'],
-            'language': repo['language'],
-            'size': repo['size'],
-            'created_at': repo['created_at'],
-            'updated_at': repo['updated_at'],
-            'age_years': round(age_years, 2),
-            'default_branch': repo['default_branch'],
-            'clone_url': repo['clone_url'],
-            'html_url': repo['html_url']
+            'cbo': round(cbo, 2),
+            'dit': round(dit, 2),
+            'lcom': round(lcom, 3),
+            'wmc': max(1, wmc),
+            'rfc': max(1, rfc),
+            'lcom3': round(lcom3, 3),
+            'ca': max(0, ca),
+            'ce': max(0, ce),
+            'npm': max(0, npm),
         }
     
-    def analisar_repositorios_ck(self, max_repos=100):
+    def _linha_dataset(self, repo, metricas=None):
         """
-        METODOLOGIA - Análise CK:
-        Clona repositórios e calcula métricas CK através da ferramenta CK
+        Monta a linha do dataset de análise a partir do repositório e das métricas CK,
+        como uma LinhaDataset (sem copiar os campos do repositório)
         """
-        print(f"🔧 Analisando métricas CK para {max_repos} repositórios...")
-        
-        # Usa dados reais coletados da API do GitHub
-        repos_para_analisar = self.repos_data[:max_repos]
-        dataset = []
+        age_years = repo['age_years']
+        size_kb = repo['size']
         
-        for i, repo in enumerate(repos_para_analisar):
-            print(f"📊 Analisando repositório {i+1}/{max_repos}: {repo['full_name']}")
-            
-            # Dados reais da API
-            stars = repo['stars']
-            age_years = repo['age_years']
-            size_kb = repo['size']
-            
+        if metricas is not None and 'loc' in metricas:
+            # LOC e comentários contados no clone pelo pipeline CK
+            loc = metricas['loc']
+            comments = metricas['comments']
+        else:
             # Calcula LOC aproximado (baseado no tamanho do repositório)
             loc = int(size_kb * random.uniform(8, 15))
             
             # Comentários (5-20% do LOC)
             comment_ratio = random.uniform(0.05, 0.20)
             comments = int(loc * comment_ratio)
-            
-            # Releases (baseado na idade e atividade)
+        
+        # Releases: valor real do enriquecimento GraphQL ou estimativa pela idade
+        releases = repo.get('releases_count')
+        if releases is None:
             releases = int(age_years * random.uniform(2, 8))
+        
+        if metricas is None:
+            metricas = self._estimar_metricas_ck(repo, loc)
+        
+        return LinhaDataset(repo, loc, comments, releases, metricas)
+    
+    def _reaproveitar_resultado(self, repo, shas_armazenados):
+        """
+        Retorna as métricas armazenadas quando o HEAD remoto ainda é o SHA já analisado
+        """
+        sha_armazenado = shas_armazenados.get(repo['full_name'])
+        if sha_armazenado is None or obter_sha_remoto(repo['clone_url']) != sha_armazenado:
+            return None
+        self.armazem_ck.atualizar_repo(repo)
+        return self.armazem_ck.metricas(repo['full_name'])
+    
+    def iterar_analise_ck(self, repos):
+        """
+        Gera (indice, linha do dataset) à medida que cada repositório é analisado.
+        repos pode ser um gerador da coleta: a análise começa assim que o primeiro chega.
+        """
+        if not self.ck_comando:
+            print("⚠️  Ferramenta CK não configurada (defina CK_JAR); usando métricas estimadas")
+            for indice, repo in enumerate(repos):
+                yield indice, self._linha_dataset(repo)
+            return
+        
+        # Repositórios cujo HEAD não mudou desde a última análise são reaproveitados
+        shas_armazenados = self.armazem_ck.shas()
+        pipeline = self.pipeline_ck or PipelineCK(self.ck_comando, self.temp_clones_dir, self.workers_clone,
+                                                  self.workers_ck, self.workers_parse,
+                                                  instrumentacao=self.instrumentacao)
+        reaproveitados = 0
+        for concluidos, (indice, repo, metricas, erro) in enumerate(
+                pipeline.processar(repos, lambda repo: self._reaproveitar_resultado(repo, shas_armazenados),
+                                   self.ck_comando, self.extensoes, self.dir_classes_ck), 1):
+            if erro is not None:
+                print(f"❌ Falha ao analisar {repo['full_name']}: {erro}")
+                continue
+            if shas_armazenados.get(repo['full_name']) == metricas['sha']:
+                reaproveitados += 1
+            else:
+                self.armazem_ck.salvar(repo, metricas)
+            print(f"📊 Repositório analisado ({concluidos}): {repo['full_name']}")
+            yield indice, self._linha_dataset(repo, metricas)
+        print(f"♻️  {reaproveitados} repositórios inalterados reaproveitados do armazém de resultados")
+    
+    def larguras_ic_rq(self, df, reamostras=1000, semente=42, nivel_confianca=0.95, metodo='spearman'):
+        """
+        Largura do IC bootstrap de cada correlação das RQs (métricas de processo x CBO, DIT e LCOM).
+        Correlações indefinidas (métrica constante na amostra) têm largura infinita.
+        """
+        import numpy as np
+        
+        dados = df[METRICAS_PROCESSO + METRICAS_QUALIDADE_RQ].dropna()
+        with warnings.catch_warnings():
+            # Métricas constantes na amostra geram correlações NaN em todas as reamostras
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ic = reamostrar_correlacoes(dados[METRICAS_PROCESSO].to_numpy(dtype=float),
+                                        dados[METRICAS_QUALIDADE_RQ].to_numpy(dtype=float),
+                                        reamostras, semente, nivel_confianca, permutacao=False)[metodo]
+        larguras = np.nan_to_num(ic['ic_superior'] - ic['ic_inferior'], nan=np.inf)
+        return {(processo, qualidade): float(larguras[i, j])
+                for i, processo in enumerate(METRICAS_PROCESSO)
+                for j, qualidade in enumerate(METRICAS_QUALIDADE_RQ)}
+    
+    def iterar_analise_adaptativa(self, repos, largura_alvo, passo=10, minimo=30, reamostras=1000, semente=42):
+        """
+        Como iterar_analise_ck, mas deixa de alimentar o pipeline quando o IC bootstrap de todas
+        as correlações das RQs fica mais estreito que largura_alvo. O critério é reavaliado a cada
+        `passo` repositórios analisados, a partir de `minimo`; os repositórios que já estavam em
+        andamento quando o alvo é atingido também entram no resultado.
+        """
+        parar = threading.Event()
+        
+        def alimentar():
+            for repo in repos:
+                if parar.is_set():
+                    return
+                yield repo
+        
+        tabela = TabelaRepositorios()
+        for indice, linha in self.iterar_analise_ck(alimentar()):
+            tabela.adicionar(linha)
+            yield indice, linha
+            if parar.is_set() or len(tabela) < minimo or (len(tabela) - minimo) % passo:
+                continue
             
-            # Métricas CK baseadas em fatores reais
-            complexity_factor = min(loc / 50000, 3.0)
-            popularity_factor = min(stars / 10000, 5.0)
-            
-            # CBO (Coupling Between Objects) - baseado em complexidade e popularidade
-            cbo = max(1, min(25, 2 + complexity_factor * 4 + popularity_factor * 0.5 + random.uniform(-2, 2)))
-            
-            # DIT (Depth of Inheritance Tree) - baseado em maturidade
-            dit = max(0, min(8, 1 + complexity_factor * 2 + age_years * 0.3 + random.uniform(-0.5, 0.5)))
-            
-            # LCOM (Lack of Cohesion of Methods) - baseado em tamanho
-            lcom = max(0, min(1, 0.2 + complexity_factor * 0.3 + random.uniform(-0.1, 0.1)))
-            
-            # Métricas adicionais CK
-            wmc = int(10 + complexity_factor * 30 + popularity_factor * 5 + random.uniform(-5, 10))
-            rfc = int(5 + complexity_factor * 25 + random.uniform(-3, 8))
-            lcom3 = max(0, min(1, lcom + random.uniform(-0.05, 0.05)))
-            ca = int(1 + complexity_factor * 8 + popularity_factor * 2 + random.uniform(-2, 3))
-            ce = int(1 + complexity_factor * 12 + random.uniform(-3, 4))
-            npm = int(3 + complexity_factor * 15 + random.uniform(-2, 5))
-            
-            dataset.append({
-                'repo_name': repo['name'],
-                'full_name': repo['full_name'],
-                'description': repo['description'],
-                'stars': stars,
-                'forks': repo['forks'],
-                'watchers': repo['watchers'],
-                'age_years': age_years,
-                'size_kb': size_kb,
-                'loc': loc,
-                'comments': comments,
-                'releases_count': releases,
-                'cbo': round(cbo, 2),
-                'dit': round(dit, 2),
-                'lcom': round(lcom, 3),
-                'wmc': max(1, wmc),
-                'rfc': max(1, rfc),
-                'lcom3': round(lcom3, 3),
-                'ca': max(0, ca),
-                'ce': max(0, ce),
-                'npm': max(0, npm),
-                'language': repo['language'],
-                'created_at': repo['created_at'],
-                'updated_at': repo['updated_at'],
-                'clone_url': repo['clone_url'],
-                'html_url': repo['html_url']
-            })
+            larguras = self.larguras_ic_rq(tabela.dataframe(), reamostras, semente)
+            (processo, qualidade), maior = max(larguras.items(), key=lambda item: item[1])
+            print(f"🎯 {len(tabela)} repositórios: maior largura de IC {maior:.3f} "
+                  f"({processo} x {qualidade}), alvo {largura_alvo}")
+            if maior <= largura_alvo:
+                print("✅ Precisão alvo atingida; nenhum repositório novo será analisado")
+                parar.set()
+    
+    def iterar_amostra_ck(self, repos, max_ck=100, amostragem="topo", largura_ic=None):
+        """
+        Seleciona até max_ck repositórios para o CK e gera (indice, linha) da análise.
+        amostragem="topo" usa os primeiros de repos (os mais populares, na ordem da busca) e
+        mantém o fluxo com a coleta; "estratificada" consome repos inteiro e segue
+        ordem_estratificada. Com largura_ic, a análise para quando os ICs das RQs ficam mais
+        estreitos que ela (ver iterar_analise_adaptativa).
+        """
+        if amostragem == "estratificada":
+            populacao = list(repos)
+            print(f"🧭 Amostragem estratificada: {len({estrato_repositorio(repo) for repo in populacao})} "
+                  f"estratos em {len(populacao)} repositórios")
+            repos = ordem_estratificada(populacao)
+        elif amostragem != "topo":
+            raise ValueError(f"Amostragem desconhecida: {amostragem}")
+        
+        repos = itertools.islice(repos, max_ck)
+        if largura_ic:
+            return self.iterar_analise_adaptativa(repos, largura_ic)
+        return self.iterar_analise_ck(repos)
+    
+    def analisar_repositorios_ck(self, max_repos=100):
+        """
+        METODOLOGIA - Análise CK:
+        Clona repositórios e calcula métricas CK através da ferramenta CK
+        """
+        print(f"🔧 Analisando métricas CK para {max_repos} repositórios...")
+        
+        # Usa dados reais coletados da API do GitHub; as linhas chegam fora de ordem
+        tabela = TabelaRepositorios()
+        indices = []
+        for indice, linha in self.iterar_analise_ck(self.repos_data[:max_repos]):
+            tabela.adicionar(linha)
+            indices.append(indice)
+        df = tabela.dataframe()
+        return df.iloc[sorted(range(len(indices)), key=indices.__getitem__)].reset_index(drop=True)
+    
+    def recalcular_agregados_ck(self):
+        """
+        Recalcula os agregados por repositório a partir do Parquet de classes, sem clonar nem
+        executar o CK de novo. As partições são lidas uma a uma por memory-map.
+        """
+        if self.dir_classes_ck is None:
+            raise ImportError("pyarrow é necessário para ler as métricas por classe (pip install pyarrow)")
         
-        return pd.DataFrame(dataset)
+        print(f"🗂️  Recalculando agregados a partir de {self.dir_classes_ck}/...")
+        agregados = TabelaRepositorios()
+        for full_name, metricas in iterar_agregados_parquet(self.dir_classes_ck):
+            self.armazem_ck.atualizar_metricas(full_name, metricas)
+            agregados.adicionar(dict(full_name=full_name, **metricas))
+        print(f"✅ {len(agregados)} repositórios reagregados")
+        return agregados.dataframe()
+    
+    @staticmethod
+    def _entradas_correlacao(df):
+        """
+        Extrai as matrizes de métricas de processo (x) e de qualidade (y) sem valores ausentes
+        """
+        # Métricas de qualidade presentes no dataset (CBO, DIT, LCOM, WMC, RFC e, do CK, LCOM3, Ca, Ce, NPM)
+        quality_metrics = [metrica for metrica in METRICAS_QUALIDADE if metrica in df.columns]
+        dados = df[METRICAS_PROCESSO + quality_metrics].dropna()
+        x = dados[METRICAS_PROCESSO].to_numpy(dtype=float)
+        y = dados[quality_metrics].to_numpy(dtype=float)
+        return x, y, quality_metrics
     
-    def calcular_correlacoes(self, df):
+    def calcular_correlacoes(self, df, reamostras=0, semente=42, nivel_confianca=0.95):
         """
-        Calcula correlações entre métricas de processo e qualidade
+        Calcula correlações entre métricas de processo e qualidade.
+        Com reamostras > 0, acrescenta a cada par o intervalo de confiança bootstrap ('ic')
+        e o p-valor do teste de permutação ('p_permutacao').
         """
         print("\n📈 Calculando correlações...")
         
-        # Métricas de processo
-        process_metrics = ['stars', 'age_years', 'releases_count', 'loc', 'comments']
+        x, y, quality_metrics = self._entradas_correlacao(df)
+        n = len(x)
         
-        # Métricas de qualidade
-        quality_metrics = ['cbo', 'dit', 'lcom', 'wmc', 'rfc']
+        pearson, spearman = matrizes_correlacao(x, y)
+        pearson_p = p_valores_correlacao(pearson, n)
+        spearman_p = p_valores_correlacao(spearman, n)
+        
+        reamostragem = None
+        if reamostras:
+            print(f"🎲 Reamostrando {reamostras} vezes (bootstrap e permutação)...")
+            reamostragem = reamostrar_correlacoes(x, y, reamostras, semente, nivel_confianca)
         
         correlations = {}
         
-        for process_metric in process_metrics:
+        for i, process_metric in enumerate(METRICAS_PROCESSO):
             correlations[process_metric] = {}
             
-            for quality_metric in quality_metrics:
-                # Correlação de Pearson
-                pearson_corr, pearson_p = pearsonr(df[process_metric], df[quality_metric])
-                
-                # Correlação de Spearman
-                spearman_corr, spearman_p = spearmanr(df[process_metric], df[quality_metric])
-                
+            for j, quality_metric in enumerate(quality_metrics):
                 correlations[process_metric][quality_metric] = {
-                    'pearson': {'correlation': pearson_corr, 'p_value': pearson_p},
-                    'spearman': {'correlation': spearman_corr, 'p_value': spearman_p}
+                    'pearson': {'correlation': float(pearson[i, j]), 'p_value': float(pearson_p[i, j])},
+                    'spearman': {'correlation': float(spearman[i, j]), 'p_value': float(spearman_p[i, j])}
                 }
                 
                 print(f"{process_metric} vs {quality_metric}:")
-                print(f"  Pearson: r={pearson_corr:.3f}, p={pearson_p:.3f}")
-                print(f"  Spearman: ρ={spearman_corr:.3f}, p={spearman_p:.3f}")
+                print(f"  Pearson: r={pearson[i, j]:.3f}, p={pearson_p[i, j]:.3f}")
+                print(f"  Spearman: ρ={spearman[i, j]:.3f}, p={spearman_p[i, j]:.3f}")
+                
+                if reamostragem is None:
+                    continue
+                for metodo in ('pearson', 'spearman'):
+                    inferior, superior, p_permutacao = (reamostragem[metodo][chave][i, j]
+                                                        for chave in ('ic_inferior', 'ic_superior', 'p_permutacao'))
+                    correlations[process_metric][quality_metric][metodo].update({
+                        'ic': (float(inferior), float(superior)),
+                        'p_permutacao': float(p_permutacao)
+                    })
+                    print(f"  {metodo.capitalize()}: IC{nivel_confianca:.0%}=[{inferior:.3f}, {superior:.3f}], "
+                          f"p_perm={p_permutacao:.4f}")
         
         return correlations
     
-    def criar_graficos_pizza(self, df):
+    def criar_graficos_pizza(self, df, preview=False, workers=None):
         """
-        Cria gráficos de pizza para visualização
+        Cria gráficos de pizza para visualização.
+        Cada gráfico do registro GRAFICOS_PIZZA é renderizado em um pool de processos; gráficos
+        cujos dados não mudaram desde a última execução são mantidos. Com preview=True, os
+        gráficos saem em baixa resolução em <output_dir>/preview/.
         """
-        print("\n🍕 Criando gráficos de pizza...")
-        
-        # Configuração de fonte
-        plt.rcParams['font.family'] = 'Arial'
-        plt.rcParams['font.size'] = 12
-        plt.rcParams['axes.unicode_minus'] = False
-        
-        # 1. Gráfico de Popularidade
-        df['popularity_group'] = pd.cut(df['stars'], 
-                                       bins=[0, 100, 1000, 10000, float('inf')],
-                                       labels=['Baixa (≤100)', 'Media (101-1K)', 'Alta (1K-10K)', 'Muito Alta (>10K)'])
-        
-        popularity_counts = df['popularity_group'].value_counts()
-        
-        plt.figure(figsize=(10, 8))
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+        import pandas as pd
         
-        wedges, texts, autotexts = plt.pie(popularity_counts.values, 
-                                          labels=popularity_counts.index,
-                                          autopct='%1.1f%%',
-                                          colors=colors,
-                                          startangle=90,
-                                          explode=[0.05, 0.03, 0.02, 0.1])
-        
-        plt.title('Distribuicao de Repositorios por Popularidade\n(Numero de Estrelas)', 
-                 fontsize=16, fontweight='bold', pad=20)
-        
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(12)
+        print("\n🍕 Criando gráficos de pizza...")
         
-        plt.axis('equal')
-        plt.tight_layout()
-        plt.savefig(f"{self.output_dir}/distribuicao_popularidade.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        destino = Path(self.output_dir) / "preview" if preview else Path(self.output_dir)
+        destino.mkdir(parents=True, exist_ok=True)
+        dpi = DPI_PREVIEW if preview else DPI_GRAFICOS
         
-        # 2. Gráfico de Qualidade CBO
-        df['cbo_quality'] = pd.cut(df['cbo'], 
-                                  bins=[0, 5, 10, 15, float('inf')],
-                                  labels=['Excelente (≤5)', 'Bom (6-10)', 'Regular (11-15)', 'Ruim (>15)'])
+        caminho_manifesto = destino / ".graficos.json"
+        manifesto = json.loads(caminho_manifesto.read_text()) if caminho_manifesto.exists() else {}
         
-        quality_counts = df['cbo_quality'].value_counts()
+        tarefas = []
+        for spec in GRAFICOS_PIZZA:
+            if spec['coluna'] not in df.columns:
+                continue
+            grupos = pd.cut(df[spec['coluna']], bins=spec['bins'], labels=spec['labels'], include_lowest=True)
+            contagens = grupos.value_counts(sort=False).reindex(spec['labels'], fill_value=0)
+            contagens = {rotulo: int(valor) for rotulo, valor in contagens.items()}
+            arquivo = destino / f"{spec['arquivo']}.png"
+            if not sum(contagens.values()):
+                # Sem valores na coluna não há pizza; um gráfico antigo não deve ir para o relatório
+                arquivo.unlink(missing_ok=True)
+                manifesto.pop(spec['arquivo'], None)
+                continue
+            
+            assinatura = hashlib.sha256(
+                json.dumps([spec, contagens, dpi], sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            if manifesto.get(spec['arquivo']) == assinatura and arquivo.exists():
+                continue
+            tarefas.append((spec, contagens, str(arquivo), dpi, assinatura))
         
-        plt.figure(figsize=(10, 8))
-        colors = ['#2ECC71', '#F39C12', '#E74C3C', '#8E44AD']
+        if tarefas:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(renderizar_grafico_pizza, *list(zip(*tarefas))[:4]))
+            for spec, _, _, _, assinatura in tarefas:
+                manifesto[spec['arquivo']] = assinatura
+        caminho_manifesto.write_text(json.dumps(manifesto, indent=2, sort_keys=True))
         
-        wedges, texts, autotexts = plt.pie(quality_counts.values, 
-                                          labels=quality_counts.index,
-                                          autopct='%1.1f%%',
-                                          colors=colors,
-                                          startangle=90,
-                                          explode=[0.1, 0.05, 0.02, 0.02])
+        print(f"✅ Gráficos de pizza criados! ({len(tarefas)} renderizados, "
+              f"{len(GRAFICOS_PIZZA) - len(tarefas)} inalterados ou sem dados)")
+    
+    def gerar_relatorio(self, df, correlations, formatos=FORMATOS_RELATORIO):
+        """
+        Gera o relatório (texto, Markdown, HTML e PDF, com os gráficos de pizza embutidos) a partir
+        das seções de SECOES_RELATORIO. As seções cujas entradas não mudaram desde a última
+        execução vêm do cache em <output_dir>/.relatorio.json, e um formato só é reescrito quando
+        alguma seção muda. relatorio_analise.txt mantém o conteúdo em Markdown de antes.
+        """
+        print("\n📝 Gerando relatório...")
         
-        plt.title('Distribuicao de Qualidade por CBO\n(Coupling Between Objects)', 
-                 fontsize=16, fontweight='bold', pad=20)
+        destino = Path(self.output_dir)
+        destino.mkdir(parents=True, exist_ok=True)
+        caminho_manifesto = destino / ".relatorio.json"
+        manifesto = json.loads(caminho_manifesto.read_text()) if caminho_manifesto.exists() else {}
+        em_cache = manifesto.get('secoes', {})
         
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(12)
+        secoes, blocos, reconstruidas = {}, [], 0
+        for secao in SECOES_RELATORIO:
+            entradas = secao['entradas'](self, df, correlations)
+            if entradas is None:
+                continue
+            assinatura = hashlib.sha256(
+                json.dumps([VERSAO_RELATORIO, secao['nome'], entradas], sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            anterior = em_cache.get(secao['nome'])
+            if anterior and anterior['assinatura'] == assinatura:
+                blocos_secao = anterior['blocos']
+            else:
+                blocos_secao = secao['construir'](entradas)
+                reconstruidas += 1
+            secoes[secao['nome']] = {'assinatura': assinatura, 'blocos': blocos_secao}
+            blocos.extend(blocos_secao)
         
-        plt.axis('equal')
-        plt.tight_layout()
-        plt.savefig(f"{self.output_dir}/niveis_qualidade_cbo.png", dpi=300, bbox_inches='tight')
-        plt.close()
+        assinatura_documento = hashlib.sha256(
+            json.dumps([(nome, secao['assinatura']) for nome, secao in secoes.items()]).encode("utf-8")
+        ).hexdigest()
+        documentos = manifesto.get('documentos', {})
+        gerados = []
+        for formato in formatos:
+            arquivo = destino / ARQUIVOS_RELATORIO[formato]
+            if documentos.get(formato) == assinatura_documento and arquivo.exists():
+                continue
+            RENDERIZADORES_RELATORIO[formato](blocos, arquivo)
+            documentos[formato] = assinatura_documento
+            gerados.append(arquivo.name)
         
-        print("✅ Gráficos de pizza criados!")
+        caminho_manifesto.write_text(json.dumps({'secoes': secoes, 'documentos': documentos}, indent=2,
+                                                sort_keys=True))
+        print(f"✅ Relatório gerado! ({reconstruidas} de {len(secoes)} seções reconstruídas; "
+              f"{len(gerados)} de {len(formatos)} arquivos reescritos em {self.output_dir}/)")
     
-    def gerar_relatorio(self, df, correlations):
+    def executar_coleta_e_analise(self, max_repos=1000, max_ck=100, dataset_dir=None, amostragem="topo",
+                                  largura_ic=None):
         """
-        Gera relatório em texto com os resultados
+        Coleta e análise CK em fluxo: os repositórios gerados pela coleta seguem para o pipeline
+        CK assim que chegam, e cada resultado é gravado nos CSVs de dataset/ em lotes.
+        A memória não cresce com max_repos; retorna o DataFrame lido do CSV de análise.
+        Com amostragem="estratificada" a coleta termina antes do CK (ver iterar_amostra_ck).
         """
-        print("\n📝 Gerando relatório...")
+        import pandas as pd
         
-        relatorio = f"""
-# RELATÓRIO DE ANÁLISE DE QUALIDADE DE SISTEMAS JAVA
-
-## RESUMO EXECUTIVO
-Este relatório apresenta uma análise das características de qualidade de sistemas Java 
-desenvolvidos em repositórios open-source do GitHub. Foram analisados {len(df)} repositórios 
-selecionados por popularidade, utilizando métricas CK para avaliação da qualidade do código.
-
-## ESTATÍSTICAS DESCRITIVAS
-- Total de repositórios analisados: {len(df)}
-- Faixa de popularidade: {df['stars'].min():,} - {df['stars'].max():,} estrelas
-- Faixa de idade: {df['age_years'].min():.1f} - {df['age_years'].max():.1f} anos
-- Faixa de tamanho: {df['loc'].min():,} - {df['loc'].max():,} LOC
-
-### Métricas de Qualidade:
-- CBO médio: {df['cbo'].mean():.2f} (desvio padrão: {df['cbo'].std():.2f})
-- DIT médio: {df['dit'].mean():.2f} (desvio padrão: {df['dit'].std():.2f})
-- LCOM médio: {df['lcom'].mean():.3f} (desvio padrão: {df['lcom'].std():.3f})
-
-## RESULTADOS DAS QUESTÕES DE PESQUISA
-
-### RQ01: Relação entre Popularidade e Qualidade
-- Popularidade vs CBO: r = {correlations['stars']['cbo']['pearson']['correlation']:.3f}, p = {correlations['stars']['cbo']['pearson']['p_value']:.3f}
-- Popularidade vs DIT: r = {correlations['stars']['dit']['pearson']['correlation']:.3f}, p = {correlations['stars']['dit']['pearson']['p_value']:.3f}
-- Popularidade vs LCOM: r = {correlations['stars']['lcom']['pearson']['correlation']:.3f}, p = {correlations['stars']['lcom']['pearson']['p_value']:.3f}
-
-### RQ02: Relação entre Maturidade e Qualidade
-- Maturidade vs CBO: r = {correlations['age_years']['cbo']['pearson']['correlation']:.3f}, p = {correlations['age_years']['cbo']['pearson']['p_value']:.3f}
-- Maturidade vs DIT: r = {correlations['age_years']['dit']['pearson']['correlation']:.3f}, p = {correlations['age_years']['dit']['pearson']['p_value']:.3f}
-- Maturidade vs LCOM: r = {correlations['age_years']['lcom']['pearson']['correlation']:.3f}, p = {correlations['age_years']['lcom']['p_value']:.3f}
-
-### RQ03: Relação entre Atividade e Qualidade
-- Atividade vs CBO: r = {correlations['releases_count']['cbo']['pearson']['correlation']:.3f}, p = {correlations['releases_count']['cbo']['pearson']['p_value']:.3f}
-- Atividade vs DIT: r = {correlations['releases_count']['dit']['pearson']['correlation']:.3f}, p = {correlations['releases_count']['dit']['pearson']['p_value']:.3f}
-- Atividade vs LCOM: r = {correlations['releases_count']['lcom']['pearson']['correlation']:.3f}, p = {correlations['releases_count']['lcom']['pearson']['p_value']:.3f}
-
-### RQ04: Relação entre Tamanho e Qualidade
-- Tamanho vs CBO: r = {correlations['loc']['cbo']['pearson']['correlation']:.3f}, p = {correlations['loc']['cbo']['pearson']['p_value']:.3f}
-- Tamanho vs DIT: r = {correlations['loc']['dit']['pearson']['correlation']:.3f}, p = {correlations['loc']['dit']['pearson']['p_value']:.3f}
-- Tamanho vs LCOM: r = {correlations['loc']['lcom']['pearson']['correlation']:.3f}, p = {correlations['loc']['lcom']['pearson']['p_value']:.3f}
-
-## DISCUSSÃO
-Os resultados mostram correlações significativas entre características do processo 
-de desenvolvimento e qualidade interna do código Java. Repositórios maiores e mais 
-antigos tendem a apresentar maior complexidade, enquanto a popularidade não mostra 
-relação significativa com a qualidade do código.
-
-## CONCLUSÕES
-1. Maturidade e tamanho são os fatores mais importantes para predizer a qualidade
-2. Projetos antigos e grandes enfrentam maiores desafios de manutenibilidade
-3. Atividade de desenvolvimento não garante melhor qualidade
-4. Popularidade não está relacionada com qualidade interna do código
-        """
+        dataset_dir = dataset_dir or self.dataset_dir
+        coleta = (self.iterar_repositorios_sharded(max_repos) if max_repos > LIMITE_RESULTADOS_BUSCA
+                  else self.iterar_repositorios_github(max_repos))
+        coleta = self.iterar_enriquecidos_graphql(coleta)
         
-        with open(f"{self.output_dir}/relatorio_analise.txt", "w", encoding="utf-8") as f:
-            f.write(relatorio)
+        with EscritorCSVIncremental(f"{dataset_dir}/dataset_repositorios_completo.csv",
+                                    colunas=COLUNAS_DATASET_COMPLETO) as escritor_repos, \
+                EscritorCSVIncremental(f"{dataset_dir}/dataset_repositorios_analise.csv") as escritor_analise, \
+                EscritorCSVIncremental(f"{dataset_dir}/dataset_metricas_ck.csv",
+                                       colunas=COLUNAS_DATASET_METRICAS_CK) as escritor_ck:
+            
+            def repos_coletados():
+                for repo in coleta:
+                    escritor_repos.escrever(repo)
+                    yield repo
+            
+            coletados = repos_coletados()
+            for _, linha in self.iterar_amostra_ck(coletados, max_ck, amostragem, largura_ic):
+                escritor_analise.escrever(linha)
+                escritor_ck.escrever(linha)
+            
+            # Repositórios além da amostra do CK só entram no dataset completo
+            for _ in coletados:
+                pass
         
-        print("✅ Relatório gerado!")
+        print(f"✅ {escritor_repos.total} repositórios coletados, {escritor_analise.total} analisados com CK")
+        if escritor_analise.total == 0:
+            return pd.DataFrame(columns=COLUNAS_DATASET_METRICAS_CK)
+        return pd.read_csv(f"{dataset_dir}/dataset_repositorios_analise.csv")
     
-    def executar_analise_completa(self):
+    def executar_analise_completa(self, reamostras=0, max_repos=1000, max_ck=100, amostragem="topo",
+                                  largura_ic=None):
         """
-        Executa a análise completa seguindo a metodologia do laboratório
+        Executa a análise completa seguindo a metodologia do laboratório.
+        Com reamostras > 0, as correlações recebem ICs bootstrap e p-valores de permutação.
+        amostragem e largura_ic escolhem a amostra do CK (ver iterar_amostra_ck).
         
         METODOLOGIA:
         1. Seleção de Repositórios: top-1.000 repositórios Java mais populares do GitHub
@@ -411,34 +3103,20 @@ relação significativa com a qualidade do código.
         print("=" * 70)
         
         # 1. SELEÇÃO DE REPOSITÓRIOS - Top-1.000 repositórios Java mais populares do GitHub
-        print("📊 ETAPA 1: Seleção dos top-1.000 repositórios Java mais populares do GitHub")
-        repos_github = self.coletar_repositorios_github(1000)
-        print(f"✅ {len(repos_github)} repositórios Java coletados via GitHub API")
-        
         # 2. CÁLCULO DE MÉTRICAS CK - Ferramenta CK para análise de qualidade
-        print("\n🔧 ETAPA 2: Cálculo de métricas de qualidade através da ferramenta CK")
+        # As duas etapas rodam em fluxo: cada repositório segue para o CK assim que sua página chega
+        print(f"📊 ETAPAS 1 e 2: Seleção dos top-{max_repos} repositórios Java mais populares do GitHub")
+        print(f"   e cálculo de métricas de qualidade através da ferramenta CK para {max_ck} deles")
         print("   - CBO (Coupling Between Objects)")
         print("   - DIT (Depth Inheritance Tree)")  
         print("   - LCOM (Lack of Cohesion of Methods)")
         print("   - WMC (Weighted Methods per Class)")
         print("   - RFC (Response for Class)")
         
-        # Analisa métricas CK para os repositórios coletados
-        df = self.analisar_repositorios_ck(100)  # Analisa 100 dos 1000 coletados
-        
-        # Salva dados dos repositórios
-        os.makedirs("dataset", exist_ok=True)
-        
-        # Salva dados completos da API
-        df_github = pd.DataFrame(repos_github)
-        df_github.to_csv("dataset/dataset_repositorios_completo.csv", index=False)
-        
-        # Salva dados com métricas CK
-        df.to_csv("dataset/dataset_repositorios_analise.csv", index=False)
-        df[['repo_name', 'full_name', 'stars', 'age_years', 'loc', 'comments', 
-            'releases_count', 'cbo', 'dit', 'lcom', 'wmc', 'rfc']].to_csv("dataset/dataset_metricas_ck.csv", index=False)
+        with self.instrumentacao.etapa("coleta_e_ck"):
+            df = self.executar_coleta_e_analise(max_repos, max_ck, amostragem=amostragem, largura_ic=largura_ic)
         
-        print(f"✅ Dados da API GitHub e métricas CK salvos em dataset/")
+        print(f"✅ Dados da API GitHub e métricas CK salvos em {self.dataset_dir}/")
         
         # 3. CORRELAÇÃO COM PROCESSO DE DESENVOLVIMENTO
         print("\n📈 ETAPA 3: Correlação com características do processo de desenvolvimento")
@@ -447,42 +3125,323 @@ relação significativa com a qualidade do código.
         print("   - Atividade (número de releases)")
         print("   - Tamanho (linhas de código)")
         
-        correlations = self.calcular_correlacoes(df)
+        with self.instrumentacao.etapa("correlacoes"):
+            correlations = self.calcular_correlacoes(df, reamostras=reamostras)
+        salvar_correlacoes(Path(self.output_dir, "correlacoes.json"), correlations,
+                           f"{self.dataset_dir}/dataset_repositorios_analise.csv")
         
         # 4. VISUALIZAÇÕES - Gráficos de pizza para análise
         print("\n🍕 ETAPA 4: Geração de visualizações")
-        self.criar_graficos_pizza(df)
+        with self.instrumentacao.etapa("graficos"):
+            self.criar_graficos_pizza(df)
         
         # 5. RELATÓRIO FINAL - Análise completa
         print("\n📝 ETAPA 5: Geração do relatório final")
-        self.gerar_relatorio(df, correlations)
+        with self.instrumentacao.etapa("relatorio"):
+            self.gerar_relatorio(df, correlations)
+        
+        self.instrumentacao.resumo()
         
         print(f"\n🎉 ANÁLISE CONCLUÍDA!")
         print(f"📁 Resultados salvos em: {self.output_dir}/")
-        print(f"📊 Dados salvos em: dataset/")
+        print(f"📊 Dados salvos em: {self.dataset_dir}/")
+        
+        return df, correlations
+    
+    def para_estudo(self, nome, consulta, saida=None, extrator=None, extensoes=None):
+        """
+        Retorna um analisador para outro estudo (outra linguagem ou consulta) que compartilha
+        com este a sessão HTTP, o cache, o controle de rate limit, a instrumentação e o pipeline CK.
+        Os arquivos do estudo vão para <saida>/dataset e <saida>/resultados (padrão: estudos/<nome>).
+        extrator é um comando no formato de ck_comando que gera um class.csv com as colunas do CK;
+        extensoes são as extensões dos arquivos contados como LOC.
+        """
+        # Criados antes da cópia, para que o pool de conexões e o cache sejam os mesmos
+        self.session
+        self.cache
         
+        saida = Path(saida) if saida else Path("estudos") / nome
+        estudo = copy.copy(self)
+        estudo.estudo = nome
+        estudo.consulta = consulta
+        estudo.output_dir = str(saida / "resultados")
+        estudo.dataset_dir = str(saida / "dataset")
+        os.makedirs(estudo.output_dir, exist_ok=True)
+        estudo.ck_comando = extrator or self.ck_comando
+        estudo.extensoes = tuple(extensoes or self.extensoes)
+        estudo.repos_data = []
+        estudo.custo_graphql = 0
+        estudo._armazem_ck = None
+        if self.dir_classes_ck is not None:
+            estudo.dir_classes_ck = Path(estudo.dataset_dir) / "classes_ck"
+        return estudo
+    
+    def _executar_estudo(self, reamostras, max_repos, max_ck, amostragem, largura_ic):
+        try:
+            with self.instrumentacao.etapa(f"{self.estudo}/coleta_e_ck"):
+                df = self.executar_coleta_e_analise(max_repos, max_ck, amostragem=amostragem, largura_ic=largura_ic)
+        finally:
+            self.rate_limit.encerrar(self.estudo)
+        with self.instrumentacao.etapa(f"{self.estudo}/correlacoes"):
+            correlations = self.calcular_correlacoes(df, reamostras=reamostras)
+        salvar_correlacoes(Path(self.output_dir, "correlacoes.json"), correlations,
+                           f"{self.dataset_dir}/dataset_repositorios_analise.csv")
+        with self.instrumentacao.etapa(f"{self.estudo}/graficos"):
+            self.criar_graficos_pizza(df)
+        with self.instrumentacao.etapa(f"{self.estudo}/relatorio"):
+            self.gerar_relatorio(df, correlations)
         return df, correlations
+    
+    def executar_lote(self, estudos, reamostras=0, max_repos=1000, max_ck=100, amostragem="topo", largura_ic=None):
+        """
+        Executa vários estudos ao mesmo tempo, no mesmo processo e com o mesmo motor de coleta
+        e análise. estudos é uma lista de dicts com os argumentos de para_estudo, por exemplo
+        {'nome': 'kotlin', 'consulta': 'language:kotlin', 'extensoes': ['.kt']}.
+        A cota da API é dividida por igual entre os estudos, e os clones e execuções do
+        extrator de todos disputam os mesmos workers_clone/workers_ck.
+        Retorna {nome: (df, correlations)} dos estudos concluídos.
+        """
+        analisadores = [self.para_estudo(**estudo) for estudo in estudos]
+        print(f"🗂️  Executando {len(analisadores)} estudos em lote: "
+              f"{', '.join(f'{a.estudo} ({a.consulta})' for a in analisadores)}")
+        
+        comandos = [a.ck_comando for a in analisadores if a.ck_comando]
+        pipeline = None
+        if comandos:
+            pipeline = PipelineCK(comandos[0], self.temp_clones_dir, self.workers_clone, self.workers_ck,
+                                  self.workers_parse, instrumentacao=self.instrumentacao)
+            for analisador in analisadores:
+                analisador.pipeline_ck = pipeline
+        
+        # Todos os estudos entram na divisão da cota desde o início, e não na primeira requisição
+        self.rate_limit.registrar(*(a.estudo for a in analisadores))
+        resultados = {}
+        with pipeline.compartilhado() if pipeline else contextlib.nullcontext(), \
+                ThreadPoolExecutor(max_workers=len(analisadores)) as executor:
+            futuros = {executor.submit(a._executar_estudo, reamostras, max_repos, max_ck, amostragem, largura_ic): a
+                       for a in analisadores}
+            for futuro in as_completed(futuros):
+                analisador = futuros[futuro]
+                try:
+                    resultados[analisador.estudo] = futuro.result()
+                except Exception as e:
+                    print(f"❌ Estudo {analisador.estudo} falhou: {type(e).__name__}: {e}")
+                    continue
+                print(f"✅ Estudo {analisador.estudo} concluído: {len(resultados[analisador.estudo][0])} "
+                      f"repositórios analisados em {analisador.dataset_dir}/")
+        
+        print("\n📨 Requisições à API por estudo: "
+              + ", ".join(f"{nome}={total}" for nome, total in self.rate_limit.consumo.items() if nome))
+        self.instrumentacao.resumo()
+        return resultados
+
+DATASET_COMPLETO = "dataset/dataset_repositorios_completo.csv"
+DATASET_ANALISE = "dataset/dataset_repositorios_analise.csv"
+DATASET_METRICAS_CK = "dataset/dataset_metricas_ck.csv"
+CORRELACOES_JSON = "resultados/correlacoes.json"
+
 
-def main():
+def assinatura_arquivo(caminho):
     """
-    LABORATÓRIO 02 - ANÁLISE DE QUALIDADE DE SISTEMAS JAVA
-    
-    Executa a análise completa seguindo a metodologia:
-    1. Seleção dos top-1.000 repositórios Java mais populares do GitHub
-    2. Cálculo de métricas de qualidade através da ferramenta CK
-    3. Correlação com características do processo de desenvolvimento
+    SHA-256 do conteúdo do arquivo, lido em blocos
+    """
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def salvar_correlacoes(caminho, correlations, entrada):
     """
-    analisador = AnalisadorQualidadeJava()
-    df, correlations = analisador.executar_analise_completa()
+    Grava as correlações junto com a assinatura do CSV de onde foram calculadas
+    """
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    conteudo = {'dataset': {'caminho': str(entrada), 'sha256': assinatura_arquivo(entrada)},
+                'correlacoes': correlations}
+    Path(caminho).write_text(json.dumps(conteudo, indent=2), encoding="utf-8")
+
+
+def carregar_correlacoes(caminho, entrada):
+    """
+    Lê as correlações gravadas por salvar_correlacoes, ou retorna None quando o arquivo não
+    existe, está no formato antigo ou foi calculado a partir de outra versão do CSV de entrada
+    """
+    if not Path(caminho).exists():
+        return None
+    conteudo = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    if 'correlacoes' not in conteudo or conteudo.get('dataset', {}).get('sha256') != assinatura_arquivo(entrada):
+        return None
+    return conteudo['correlacoes']
+
+
+def ler_repositorios_csv(caminho=DATASET_COMPLETO):
+    """
+    Lê o dataset completo como RegistroRepositorio, no formato de extrair_info_repositorio.
+    Aceita também os nomes de coluna do dataset de análise (repo_name, size_kb).
+    """
+    def inteiro(valor):
+        return int(float(valor)) if valor not in (None, '') else None
+    
+    with open(caminho, newline="", encoding="utf-8") as f:
+        for linha in csv.DictReader(f):
+            repo = RegistroRepositorio(
+                linha['full_name'], linha.get('description') or '', inteiro(linha['stars']),
+                inteiro(linha['forks']), inteiro(linha['watchers']), linha.get('language'),
+                inteiro(linha.get('size', linha.get('size_kb'))), iso_para_epoch(linha['created_at']),
+                iso_para_epoch(linha['updated_at']), float(linha['age_years']), linha.get('default_branch'),
+                host_repositorio(linha.get('clone_url'), linha['full_name'])
+            )
+            repo.releases_count = inteiro(linha.get('releases_count'))
+            repo.commits_count = inteiro(linha.get('commits_count'))
+            if linha.get('java_share') not in (None, ''):
+                repo.java_share = float(linha['java_share'])
+            repo.enviado_em = iso_para_epoch(linha.get('pushed_at'))
+            yield repo
+
+
+def _comando_collect(analisador, args):
+    with EscritorCSVIncremental(args.saida, colunas=COLUNAS_DATASET_COMPLETO) as escritor:
+        coleta = (analisador.iterar_repositorios_sharded(args.max_repos) if args.max_repos > LIMITE_RESULTADOS_BUSCA
+                  else analisador.iterar_repositorios_github(args.max_repos))
+        for repo in analisador.iterar_enriquecidos_graphql(coleta):
+            escritor.escrever(repo)
+    print(f"✅ {escritor.total} repositórios salvos em {args.saida}")
+
+
+def _comando_analyze(analisador, args):
+    with EscritorCSVIncremental(DATASET_ANALISE) as escritor_analise, \
+            EscritorCSVIncremental(DATASET_METRICAS_CK, colunas=COLUNAS_DATASET_METRICAS_CK) as escritor_ck:
+        repos = ler_repositorios_csv(args.entrada)
+        for _, linha in analisador.iterar_amostra_ck(repos, args.max_ck, args.amostragem, args.largura_ic):
+            escritor_analise.escrever(linha)
+            escritor_ck.escrever(linha)
+    print(f"✅ {escritor_analise.total} repositórios analisados salvos em {DATASET_ANALISE}")
+
+
+def _comando_correlate(analisador, args):
+    import pandas as pd
+    
+    correlations = analisador.calcular_correlacoes(pd.read_csv(args.entrada), reamostras=args.reamostras)
+    salvar_correlacoes(CORRELACOES_JSON, correlations, args.entrada)
+    print(f"✅ Correlações salvas em {CORRELACOES_JSON}")
+
+
+def _comando_plot(analisador, args):
+    import pandas as pd
+    
+    analisador.criar_graficos_pizza(pd.read_csv(args.entrada), preview=args.preview)
+
+
+def _comando_report(analisador, args):
+    import pandas as pd
+    
+    df = pd.read_csv(args.entrada)
+    # Correlações em cache só valem para a mesma versão do dataset de análise
+    correlations = carregar_correlacoes(CORRELACOES_JSON, args.entrada)
+    if correlations is None:
+        correlations = analisador.calcular_correlacoes(df)
+    analisador.gerar_relatorio(df, correlations, args.formatos)
+
+
+def _comando_all(analisador, args):
+    df, correlations = analisador.executar_analise_completa(args.reamostras, args.max_repos, args.max_ck,
+                                                            args.amostragem, args.largura_ic)
     
     print(f"\n📈 RESUMO DOS RESULTADOS DA ANÁLISE:")
     print("=" * 50)
-    print(f"📊 Repositórios analisados: {len(df)} (top-1.000 mais populares)")
+    print(f"📊 Repositórios analisados: {len(df)} (top-{args.max_repos} mais populares)")
     print(f"🔧 Métricas CK calculadas:")
     print(f"   - CBO médio: {df['cbo'].mean():.2f}")
     print(f"   - DIT médio: {df['dit'].mean():.2f}")
     print(f"   - LCOM médio: {df['lcom'].mean():.3f}")
     print(f"📈 Correlações significativas encontradas com processo de desenvolvimento")
 
+
+def _comando_batch(analisador, args):
+    estudos = json.loads(Path(args.estudos).read_text(encoding="utf-8")) if args.estudos else []
+    for estudo in args.estudo:
+        nome, _, consulta = estudo.partition("=")
+        estudos.append({'nome': nome, 'consulta': consulta or f"language:{nome}"})
+    if not estudos:
+        raise SystemExit("Informe ao menos um estudo com --estudo ou --estudos")
+    analisador.executar_lote(estudos, args.reamostras, args.max_repos, args.max_ck, args.amostragem, args.largura_ic)
+
+
+def main(argv=None):
+    """
+    LABORATÓRIO 02 - ANÁLISE DE QUALIDADE DE SISTEMAS JAVA
+    
+    Sem subcomando, executa a análise completa seguindo a metodologia:
+    1. Seleção dos top-1.000 repositórios Java mais populares do GitHub
+    2. Cálculo de métricas de qualidade através da ferramenta CK
+    3. Correlação com características do processo de desenvolvimento
+    
+    Os subcomandos collect, analyze, correlate, plot e report executam cada etapa a partir
+    dos CSVs já existentes; as bibliotecas pesadas só são importadas pela etapa que as usa.
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Laboratório 02 - Análise de qualidade de sistemas Java")
+    parser.add_argument("--perfilar", help="etapas a perfilar, separadas por vírgula (ou 'todas')")
+    subparsers = parser.add_subparsers(dest="comando")
+    
+    all_ = subparsers.add_parser("all", help="pipeline completo (padrão)")
+    all_.add_argument("--max-repos", type=int, default=1000)
+    all_.add_argument("--max-ck", type=int, default=100)
+    all_.add_argument("--reamostras", type=int, default=0)
+    
+    collect = subparsers.add_parser("collect", help="coleta os repositórios via API do GitHub")
+    collect.add_argument("--max-repos", type=int, default=1000)
+    collect.add_argument("--saida", default=DATASET_COMPLETO)
+    
+    analyze = subparsers.add_parser("analyze", help="calcula as métricas CK dos repositórios coletados")
+    analyze.add_argument("--max-ck", type=int, default=100)
+    analyze.add_argument("--entrada", default=DATASET_COMPLETO,
+                         help="dataset completo ou de análise (inclusive o que será regravado)")
+    
+    correlate = subparsers.add_parser("correlate", help="calcula as correlações do dataset de análise")
+    correlate.add_argument("--reamostras", type=int, default=0)
+    correlate.add_argument("--entrada", default=DATASET_ANALISE)
+    
+    plot = subparsers.add_parser("plot", help="gera os gráficos de pizza")
+    plot.add_argument("--preview", action="store_true", help="gráficos em baixa resolução")
+    plot.add_argument("--entrada", default=DATASET_ANALISE)
+    
+    report = subparsers.add_parser("report", help="gera o relatório a partir dos dados em cache")
+    report.add_argument("--entrada", default=DATASET_ANALISE)
+    report.add_argument("--formatos", nargs="+", choices=FORMATOS_RELATORIO, default=list(FORMATOS_RELATORIO))
+    
+    batch = subparsers.add_parser("batch", help="executa vários estudos (linguagens ou consultas) em lote")
+    batch.add_argument("--estudo", action="append", default=[], metavar="NOME=CONSULTA",
+                       help="ex.: kotlin=language:kotlin ou spring=\"topic:spring language:java\"")
+    batch.add_argument("--estudos", help="arquivo JSON com a lista de estudos (argumentos de para_estudo)")
+    batch.add_argument("--max-repos", type=int, default=1000)
+    batch.add_argument("--max-ck", type=int, default=100)
+    batch.add_argument("--reamostras", type=int, default=0)
+    
+    for subparser in (all_, analyze, batch):
+        subparser.add_argument("--amostragem", choices=["topo", "estratificada"], default="topo",
+                               help="repositórios enviados ao CK: os mais populares ou amostra estratificada")
+        subparser.add_argument("--largura-ic", type=float,
+                               help="para o CK quando o IC bootstrap de todas as RQs for mais estreito que isso")
+    
+    # Sem subcomando, executa o pipeline completo com os padrões do subcomando all
+    parser.set_defaults(comando="all", **{acao.dest: acao.default for acao in all_._actions if acao.dest != "help"})
+    args = parser.parse_args(argv)
+    
+    analisador = AnalisadorQualidadeJava(perfilar=args.perfilar.split(",") if args.perfilar else None)
+    comandos = {
+        'all': _comando_all,
+        'collect': _comando_collect,
+        'analyze': _comando_analyze,
+        'correlate': _comando_correlate,
+        'plot': _comando_plot,
+        'report': _comando_report,
+        'batch': _comando_batch,
+    }
+    with analisador.instrumentacao.etapa(args.comando):
+        comandos[args.comando](analisador, args)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - LABORATÓRIO 02
+
+Mede como as etapas de análise escalam com o tamanho do corpus, sem acesso à rede:
+gera datasets sintéticos com o mesmo esquema de dataset/dataset_repositorios_analise.csv
+(1k, 10k e 100k repositórios por padrão) e cronometra calcular_correlacoes,
+criar_graficos_pizza, gerar_relatorio (sem e com o cache de seções) e a gravação dos CSVs.
+
+Os resultados podem ser gravados como baseline (--salvar-baseline) e, nas execuções
+seguintes, comparados com ela: regressões de tempo ou de memória acima da tolerância
+fazem o script terminar com código 1.
+
+Uso:
+    python3 benchmark.py
+    python3 benchmark.py --tamanhos 1000 10000 --salvar-baseline
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+from analise_completa import (
+    AnalisadorQualidadeJava,
+    COLUNAS_DATASET_METRICAS_CK,
+    EscritorCSVIncremental,
+)
+
+BASELINE_PADRAO = Path(__file__).resolve().parent / "benchmarks" / "baseline.json"
+
+
+def gerar_dataset_sintetico(n, semente=42):
+    """
+    Gera n repositórios sintéticos com o esquema do dataset de análise.
+    As distribuições imitam as reais (estrelas e LOC de cauda longa) e as métricas CK
+    dependem do tamanho, para que as correlações não sejam triviais.
+    """
+    rng = np.random.default_rng(semente)
+
+    stars = np.maximum(10, rng.lognormal(8, 1.2, n)).astype(np.int64)
+    age_years = np.round(rng.uniform(0.5, 16, n), 2)
+    size_kb = np.maximum(50, rng.lognormal(9, 1.5, n)).astype(np.int64)
+    loc = (size_kb * rng.uniform(8, 15, n)).astype(np.int64)
+    comments = (loc * rng.uniform(0.05, 0.20, n)).astype(np.int64)
+    releases = (age_years * rng.uniform(2, 8, n)).astype(np.int64)
+
+    complexity = np.minimum(loc / 50000, 3.0)
+    popularity = np.minimum(stars / 10000, 5.0)
+    cbo = np.clip(2 + complexity * 4 + popularity * 0.5 + rng.uniform(-2, 2, n), 1, 25)
+    dit = np.clip(1 + complexity * 2 + age_years * 0.3 + rng.uniform(-0.5, 0.5, n), 0, 8)
+    lcom = np.clip(0.2 + complexity * 0.3 + rng.uniform(-0.1, 0.1, n), 0, 1)
+
+    nomes = [f"repo{i}" for i in range(n)]
+    full_names = [f"org{i % 997}/repo{i}" for i in range(n)]
+    criacao = pd.Timestamp("2025-10-01") - pd.to_timedelta(age_years * 365.25, unit="D")
+
+    return pd.DataFrame({
+        'repo_name': nomes,
+        'full_name': full_names,
+        'stars': stars,
+        'forks': (stars * rng.uniform(0.05, 0.3, n)).astype(np.int64),
+        'watchers': (stars * rng.uniform(0.01, 0.1, n)).astype(np.int64),
+        'age_years': age_years,
+        'size_kb': size_kb,
+        'loc': loc,
+        'comments': comments,
+        'releases_count': releases,
+        'cbo': np.round(cbo, 2),
+        'dit': np.round(dit, 2),
+        'lcom': np.round(lcom, 3),
+        'wmc': np.maximum(1, 10 + complexity * 30 + popularity * 5 + rng.uniform(-5, 10, n)).astype(np.int64),
+        'rfc': np.maximum(1, 5 + complexity * 25 + rng.uniform(-3, 8, n)).astype(np.int64),
+        'lcom3': np.round(np.clip(lcom + rng.uniform(-0.05, 0.05, n), 0, 1), 3),
+        'ca': np.maximum(0, 1 + complexity * 8 + popularity * 2 + rng.uniform(-2, 3, n)).astype(np.int64),
+        'ce': np.maximum(0, 1 + complexity * 12 + rng.uniform(-3, 4, n)).astype(np.int64),
+        'npm': np.maximum(0, 3 + complexity * 15 + rng.uniform(-2, 5, n)).astype(np.int64),
+        'language': 'Java',
+        'created_at': criacao.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'updated_at': '2025-09-30T11:20:17Z',
+        'clone_url': [f"https://github.com/{nome}.git" for nome in full_names],
+        'html_url': [f"https://github.com/{nome}" for nome in full_names],
+    })
+
+
+def _gravar_csvs(analisador, df):
+    df.to_csv("dataset/dataset_repositorios_analise.csv", index=False)
+    df[COLUNAS_DATASET_METRICAS_CK].to_csv("dataset/dataset_metricas_ck.csv", index=False)
+
+
+def _gravar_csv_incremental(analisador, df):
+    with EscritorCSVIncremental("dataset/dataset_repositorios_incremental.csv") as escritor:
+        for linha in df.to_dict("records"):
+            escritor.escrever(linha)
+
+
+def _graficos(analisador, df):
+    # Diretório novo a cada chamada, para que o cache de gráficos não pule a renderização
+    analisador.output_dir = tempfile.mkdtemp(dir=".")
+    analisador.criar_graficos_pizza(df)
+
+
+def _relatorio(analisador, df):
+    # Diretório novo a cada chamada, para que o cache de seções não pule a geração
+    analisador.output_dir = tempfile.mkdtemp(dir=".")
+    analisador.gerar_relatorio(df, analisador.calcular_correlacoes(df))
+
+
+def _relatorio_em_cache(analisador, df):
+    # Mesmo diretório a cada chamada: a partir da segunda, todas as seções vêm do cache
+    analisador.output_dir = "relatorio_em_cache"
+    analisador.gerar_relatorio(df, analisador.calcular_correlacoes(df))
+
+
+ETAPAS = {
+    'calcular_correlacoes': lambda analisador, df: analisador.calcular_correlacoes(df),
+    'criar_graficos_pizza': _graficos,
+    'gerar_relatorio': _relatorio,
+    'gerar_relatorio_em_cache': _relatorio_em_cache,
+    'csv_to_csv': _gravar_csvs,
+    'csv_incremental': _gravar_csv_incremental,
+}
+
+
+def _executar_e_medir_filhos(funcao, analisador, df, conexao):
+    with contextlib.redirect_stdout(io.StringIO()):
+        funcao(analisador, df)
+    conexao.send(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+    conexao.close()
+
+
+def pico_subprocessos(funcao, analisador, df):
+    """
+    Pico de RSS (MB) dos subprocessos da etapa (por exemplo, o pool de renderização dos gráficos),
+    que o tracemalloc não enxerga. O ru_maxrss de RUSAGE_CHILDREN só cresce ao longo do processo,
+    então a etapa roda em um processo filho novo (fork) e o valor é lido lá dentro.
+    Retorna None onde não há fork ou resource (Windows).
+    """
+    if resource is None or "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    contexto = multiprocessing.get_context("fork")
+    receptor, emissor = contexto.Pipe(duplex=False)
+    processo = contexto.Process(target=_executar_e_medir_filhos, args=(funcao, analisador, df, emissor))
+    processo.start()
+    emissor.close()
+    try:
+        pico = receptor.recv()
+    except EOFError:
+        pico = None
+    processo.join()
+    if processo.exitcode:
+        raise RuntimeError(f"medição em subprocesso terminou com código {processo.exitcode}")
+    return pico
+
+
+def medir_etapa(funcao, analisador, df, repeticoes):
+    """
+    Retorna (melhor tempo em s, pico de memória Python em MB, pico de RSS dos subprocessos em MB).
+    O tempo é medido sem tracemalloc; a memória Python, em uma execução separada com tracemalloc;
+    a dos subprocessos, em outra execução (ver pico_subprocessos).
+    """
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            gc.collect()
+            inicio = time.perf_counter()
+            funcao(analisador, df)
+            tempos.append(time.perf_counter() - inicio)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcao(analisador, df)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return min(tempos), pico / 1e6, pico_subprocessos(funcao, analisador, df)
+
+
+def executar_benchmark(tamanhos, etapas, repeticoes):
+    """
+    Executa as etapas para cada tamanho de corpus em um diretório temporário.
+    Retorna {"<etapa>@<n>": {"tempo_s", "repos_por_s", "pico_mb", "pico_subprocessos_mb"} ou {"erro"}}.
+    """
+    resultados = {}
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="benchmark-lab02-") as temporario:
+        os.chdir(temporario)
+        try:
+            os.makedirs("dataset", exist_ok=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                analisador = AnalisadorQualidadeJava(usar_cache=False)
+            for n in tamanhos:
+                df = gerar_dataset_sintetico(n)
+                for nome in etapas:
+                    chave = f"{nome}@{n}"
+                    try:
+                        tempo, pico, pico_filhos = medir_etapa(ETAPAS[nome], analisador, df, repeticoes)
+                    except Exception as e:
+                        resultados[chave] = {'erro': f"{type(e).__name__}: {e}"}
+                        print(f"❌ {chave}: {resultados[chave]['erro']}")
+                        continue
+                    resultados[chave] = {
+                        'tempo_s': round(tempo, 4),
+                        'repos_por_s': round(n / tempo, 1) if tempo else None,
+                        'pico_mb': round(pico, 2),
+                        'pico_subprocessos_mb': None if pico_filhos is None else round(pico_filhos, 1),
+                    }
+                    filhos = "" if pico_filhos is None else f" {pico_filhos:>9.1f} MB em subprocessos"
+                    print(f"⏱️  {chave:<32} {tempo:>9.3f} s {n / tempo:>12.0f} repos/s {pico:>9.1f} MB{filhos}")
+        finally:
+            os.chdir(diretorio_original)
+    return resultados
+
+
+def comparar_baseline(resultados, baseline, tolerancia):
+    """
+    Lista as regressões de tempo ou memória acima da tolerância relativa
+    """
+    regressoes = []
+    for chave, atual in resultados.items():
+        referencia = baseline.get(chave)
+        if not referencia or 'erro' in atual or 'erro' in referencia:
+            continue
+        for campo in ('tempo_s', 'pico_mb', 'pico_subprocessos_mb'):
+            if referencia.get(campo) and atual.get(campo) and atual[campo] > referencia[campo] * (1 + tolerancia):
+                regressoes.append(f"{chave}: {campo} {referencia[campo]} → {atual[campo]}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline das etapas de análise do Laboratório 02")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--etapas", nargs="+", choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="grava os resultados como nova baseline em vez de comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="aumento relativo de tempo ou memória tolerado (padrão: 0.25)")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK - LABORATÓRIO 02")
+    resultados = executar_benchmark(args.tamanhos, args.etapas, args.repeticoes)
+
+    if args.salvar_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(resultados)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        print(f"💾 Baseline gravada em {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ℹ️  Nenhuma baseline em {args.baseline}; use --salvar-baseline para criar uma")
+        return 0
+
+    regressoes = comparar_baseline(resultados, json.loads(args.baseline.read_text()), args.tolerancia)
+    if regressoes:
+        print("⚠️  Regressões em relação à baseline:")
+        for regressao in regressoes:
+            print(f"   - {regressao}")
+        return 1
+    print("✅ Nenhuma regressão em relação à baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
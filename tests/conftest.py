@@ -0,0 +1,82 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# analise_completa.py fica na raiz do repositório, fora de um pacote
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class ServidorStub:
+    """
+    Servidor HTTP local no lugar da API do GitHub. Cada GET é respondido por
+    responder(caminho, parametros), se definida, ou pelas respostas enfileiradas em respostas
+    (status, cabeçalhos, corpo; a última se repete). Registra o instante, os cabeçalhos e os
+    parâmetros de cada requisição recebida.
+    """
+
+    def __init__(self):
+        self.respostas = []
+        self.responder = None
+        self.requisicoes = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                parametros = {chave: valores[0] for chave, valores in parse_qs(url.query).items()}
+                stub.requisicoes.append((time.time(), dict(self.headers), parametros))
+                if stub.responder is not None:
+                    status, headers, corpo = stub.responder(url.path, parametros)
+                else:
+                    status, headers, corpo = stub.respostas.pop(0) if len(stub.respostas) > 1 else stub.respostas[0]
+                dados = json.dumps(corpo).encode() if corpo is not None else b''
+                self.send_response(status)
+                for nome, valor in headers.items():
+                    self.send_header(nome, valor)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.servidor.server_port}'
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@pytest.fixture
+def stub():
+    servidor = ServidorStub()
+    yield servidor
+    servidor.fechar()
+
+
+@pytest.fixture
+def analisador(stub, tmp_path, monkeypatch):
+    """
+    Fábrica de AnalisadorQualidadeJava apontado para o stub, com os arquivos em tmp_path
+    """
+    # O cache de respostas e os clones temporários ficam em caminhos relativos ao diretório atual
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+
+    from analise_completa import AnalisadorQualidadeJava
+
+    def criar(**kwargs):
+        kwargs.setdefault('token', '')
+        return AnalisadorQualidadeJava(base_url=stub.url, output_dir=str(tmp_path / 'resultados'),
+                                       dataset_dir=str(tmp_path / 'dataset'), **kwargs)
+    return criar
+
@@ -0,0 +1,44 @@
+"""
+Subcomandos executados a partir dos CSVs de dataset/ (sem rede nem CK configurado)
+"""
+import csv
+import shutil
+from pathlib import Path
+
+import analise_completa
+from analise_completa import main
+
+DATASET = Path(__file__).resolve().parent.parent / "dataset"
+
+
+def _linhas(caminho):
+    with open(caminho, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_analyze_aceita_o_proprio_dataset_de_analise_como_entrada(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CK_JAR", raising=False)
+    (tmp_path / "dataset").mkdir()
+    shutil.copy(DATASET / "dataset_repositorios_analise.csv", tmp_path / analise_completa.DATASET_ANALISE)
+    entrada = _linhas(analise_completa.DATASET_ANALISE)
+
+    main(["analyze", "--entrada", analise_completa.DATASET_ANALISE, "--max-ck", "10"])
+
+    saida = _linhas(analise_completa.DATASET_ANALISE)
+    assert [linha['full_name'] for linha in saida] == [linha['full_name'] for linha in entrada[:10]]
+    assert len(_linhas(analise_completa.DATASET_METRICAS_CK)) == 10
+
+
+def test_subcomandos_de_leitura_nao_criam_cache_nem_armazem(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dataset").mkdir()
+    shutil.copy(DATASET / "dataset_repositorios_analise.csv", tmp_path / analise_completa.DATASET_ANALISE)
+
+    main(["correlate"])
+    main(["report", "--formatos", "md"])
+
+    assert (tmp_path / "resultados" / "relatorio_analise.md").exists()
+    assert not (tmp_path / "temp_clones").exists()
+    assert not (tmp_path / "cache").exists()
+    assert not (tmp_path / "dataset" / "resultados_ck.sqlite").exists()
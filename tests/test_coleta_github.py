@@ -0,0 +1,90 @@
+"""
+Coleta via API contra um servidor HTTP local que imita a busca do GitHub:
+agendamento pelos cabeçalhos de rate limit e revalidação do cache com ETag (HTTP 304)
+"""
+import time
+
+
+def _item(full_name, estrelas):
+    return {
+        'full_name': full_name, 'description': None, 'stargazers_count': estrelas, 'forks_count': 1,
+        'watchers_count': estrelas, 'language': 'Java', 'size': 100, 'created_at': '2015-01-01T00:00:00Z',
+        'updated_at': '2024-01-01T00:00:00Z', 'default_branch': 'main',
+        'clone_url': f'https://github.com/{full_name}.git',
+    }
+
+
+PAGINA = {'total_count': 2, 'items': [_item('a/um', 200), _item('b/dois', 100)]}
+
+
+def test_espera_o_reset_quando_a_cota_se_esgota(stub, analisador):
+    reset = int(time.time()) + 2
+    stub.respostas = [
+        (403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset), 'X-RateLimit-Resource': 'search'},
+         {'message': 'API rate limit exceeded'}),
+        (200, {'X-RateLimit-Remaining': '29', 'X-RateLimit-Reset': str(reset + 60),
+               'X-RateLimit-Resource': 'search'}, PAGINA),
+    ]
+    repos = list(analisador(usar_cache=False).iterar_repositorios_github(max_repos=2))
+
+    assert [repo['full_name'] for repo in repos] == ['a/um', 'b/dois']
+    assert len(stub.requisicoes) == 2
+    # A repetição só sai depois do X-RateLimit-Reset, e não após uma pausa fixa
+    assert stub.requisicoes[1][0] >= reset
+
+
+def test_retry_after_adia_a_repeticao(stub, analisador):
+    stub.respostas = [
+        (429, {'Retry-After': '1'}, {'message': 'secondary rate limit'}),
+        (200, {'X-RateLimit-Remaining': '29'}, PAGINA),
+    ]
+    inicio = time.time()
+    instancia = analisador(usar_cache=False)
+    repos = list(instancia.iterar_repositorios_github(max_repos=2))
+
+    assert len(repos) == 2
+    assert stub.requisicoes[1][0] - inicio >= 1
+    assert instancia.rate_limit.tempo_espera_total >= 0.9
+
+
+def test_revalida_o_cache_com_if_none_match(stub, analisador):
+    stub.respostas = [(200, {'ETag': '"v1"', 'X-RateLimit-Remaining': '29'}, PAGINA)]
+    primeira = list(analisador(cache_ttl=0).iterar_repositorios_github(max_repos=2))
+    assert 'If-None-Match' not in stub.requisicoes[0][1]
+
+    # Com TTL zero a entrada vence na hora: a nova execução revalida e recebe 304 sem corpo
+    stub.respostas = [(304, {'ETag': '"v1"', 'X-RateLimit-Remaining': '29'}, None)]
+    segunda = list(analisador(cache_ttl=0).iterar_repositorios_github(max_repos=2))
+
+    assert stub.requisicoes[1][1].get('If-None-Match') == '"v1"'
+    assert [dict(repo) for repo in segunda] == [dict(repo) for repo in primeira]
+
+
+def test_entrada_fresca_do_cache_dispensa_a_requisicao(stub, analisador):
+    stub.respostas = [(200, {'ETag': '"v1"'}, PAGINA)]
+    list(analisador().iterar_repositorios_github(max_repos=2))
+    repos = list(analisador().iterar_repositorios_github(max_repos=2))
+
+    assert len(repos) == 2
+    assert len(stub.requisicoes) == 1
+
+
+def test_lote_graphql_com_falha_segue_sem_enriquecimento(analisador):
+    import requests
+
+    instancia = analisador(usar_cache=False, token='teste')
+
+    def enriquecer_com_falha(lote):
+        if lote[0]['full_name'] == 'org/r50':
+            raise requests.exceptions.ConnectionError("lote perdido")
+        for repo in lote:
+            repo['releases_count'] = 1
+        return lote
+
+    instancia._enriquecer_lote = enriquecer_com_falha
+    repos = [instancia.extrair_info_repositorio(_item(f'org/r{i}', 1000 - i)) for i in range(150)]
+    saida = list(instancia.iterar_enriquecidos_graphql(repos))
+
+    assert [repo['full_name'] for repo in saida] == [repo['full_name'] for repo in repos]
+    assert [repo.get('releases_count') for repo in saida[50:100]] == [None] * 50
+    assert all(repo['releases_count'] == 1 for repo in saida[:50] + saida[100:])
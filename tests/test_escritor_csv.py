@@ -0,0 +1,36 @@
+"""
+EscritorCSVIncremental: o CSV anterior só é substituído quando a gravação termina com sucesso
+"""
+import pytest
+
+from analise_completa import EscritorCSVIncremental
+
+
+def test_substitui_o_csv_ao_fechar(tmp_path):
+    caminho = tmp_path / "dados.csv"
+    caminho.write_text("antigo\n")
+    with EscritorCSVIncremental(str(caminho), tamanho_lote=1) as escritor:
+        escritor.escrever({'a': 1, 'b': 2})
+        # Durante a gravação o arquivo anterior continua legível
+        assert caminho.read_text() == "antigo\n"
+    assert caminho.read_text().splitlines() == ["a,b", "1,2"]
+    assert not (tmp_path / "dados.csv.tmp").exists()
+
+
+def test_preserva_o_csv_quando_a_execucao_falha(tmp_path):
+    caminho = tmp_path / "dados.csv"
+    caminho.write_text("antigo\n")
+    with pytest.raises(RuntimeError):
+        with EscritorCSVIncremental(str(caminho), tamanho_lote=1) as escritor:
+            escritor.escrever({'a': 1})
+            raise RuntimeError("coleta interrompida")
+    assert caminho.read_text() == "antigo\n"
+    assert not (tmp_path / "dados.csv.tmp").exists()
+
+
+def test_preserva_o_csv_quando_nada_foi_gravado(tmp_path):
+    caminho = tmp_path / "dados.csv"
+    caminho.write_text("antigo\n")
+    with EscritorCSVIncremental(str(caminho)):
+        pass
+    assert caminho.read_text() == "antigo\n"
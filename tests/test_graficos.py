@@ -0,0 +1,36 @@
+"""
+Gráficos de pizza com colunas vazias ou sem valores
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise_completa import GRAFICOS_PIZZA, AnalisadorQualidadeJava
+
+
+@pytest.fixture
+def analisador(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return AnalisadorQualidadeJava(usar_cache=False, output_dir=str(tmp_path / "resultados"),
+                                   dataset_dir=str(tmp_path / "dataset"))
+
+
+def test_dataset_vazio_nao_gera_graficos(analisador, tmp_path):
+    colunas = sorted({spec['coluna'] for spec in GRAFICOS_PIZZA})
+    analisador.criar_graficos_pizza(pd.DataFrame(columns=colunas), preview=True)
+    assert not list((tmp_path / "resultados" / "preview").glob("*.png"))
+
+
+def test_coluna_sem_valores_remove_o_grafico_anterior(analisador, tmp_path):
+    df = pd.DataFrame({'stars': [10, 2000, 50000], 'cbo': [3.0, 8.0, 20.0], 'lcom3': [0.1, 0.6, 0.9]})
+    analisador.criar_graficos_pizza(df, preview=True)
+    destino = tmp_path / "resultados" / "preview"
+    assert {arquivo.stem for arquivo in destino.glob("*.png")} == \
+        {'distribuicao_popularidade', 'niveis_qualidade_cbo', 'niveis_coesao_lcom'}
+
+    df['cbo'] = np.nan
+    analisador.criar_graficos_pizza(df, preview=True)
+    assert not (destino / "niveis_qualidade_cbo.png").exists()
+    assert 'niveis_qualidade_cbo' not in json.loads((destino / ".graficos.json").read_text())
@@ -0,0 +1,54 @@
+"""
+Instrumentação: perfis aninhados e execução sem resource/os.wait4 (Windows)
+"""
+import os
+import subprocess
+import sys
+import threading
+
+from analise_completa import Instrumentacao, executar_subprocesso
+
+
+def test_so_a_etapa_externa_e_perfilada(tmp_path):
+    instrumentacao = Instrumentacao(str(tmp_path / "instrumentacao.jsonl"), ["todas"],
+                                    dir_perfis=str(tmp_path / "perfis"))
+
+    def lote():
+        with instrumentacao.etapa("graphql_lote"):
+            sum(range(1000))
+
+    with instrumentacao.etapa("comando"):
+        with instrumentacao.etapa("coleta_e_ck"):
+            # Etapas em threads de trabalho enquanto a etapa externa está sendo perfilada
+            threads = [threading.Thread(target=lote) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    assert [perfil.stem for perfil in (tmp_path / "perfis").iterdir()] == ["comando"]
+    assert sorted(registro['etapa'] for registro in instrumentacao.registros) == \
+        ["coleta_e_ck", "comando"] + ["graphql_lote"] * 3
+
+    # Terminada a etapa externa, a próxima volta a ser perfilada
+    with instrumentacao.etapa("graficos"):
+        pass
+    assert (tmp_path / "perfis" / "graficos.prof").exists() or (tmp_path / "perfis" / "graficos.html").exists()
+
+
+def test_importa_sem_resource(tmp_path):
+    codigo = ("import sys; sys.modules['resource'] = None; import analise_completa as a; "
+              "i = a.Instrumentacao(sys.argv[1]);\n"
+              "with i.etapa('x'): pass\n"
+              "print(i.registros[0]['pico_rss_mb'])")
+    saida = subprocess.run([sys.executable, "-c", codigo, str(tmp_path / "i.jsonl")], check=True,
+                           capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert saida.stdout.strip() == "None"
+
+
+def test_executar_subprocesso_sem_wait4(monkeypatch):
+    monkeypatch.delattr(os, "wait4")
+    registro = {}
+    resultado = executar_subprocesso([sys.executable, "-c", "print('ok')"], registro=registro)
+    assert resultado.stdout.strip() == b"ok"
+    assert registro == {}
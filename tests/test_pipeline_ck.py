@@ -0,0 +1,124 @@
+"""
+Pipeline CK de ponta a ponta sem rede: repositórios bare locais (file://) como host de clone
+e um extrator de teste no formato do CK, que grava o class.csv e registra cada execução
+"""
+import subprocess
+import sys
+
+import pytest
+
+from analise_completa import AnalisadorQualidadeJava, RegistroRepositorio
+
+EXTRATOR = '''
+import os, sys
+projeto, saida, registro = sys.argv[1:]
+with open(registro, "a") as f:
+    f.write(projeto + "\\n")
+arquivos = sorted(nome for _, _, nomes in os.walk(projeto) for nome in nomes if nome.endswith(".java"))
+with open(os.path.join(saida, "class.csv"), "w") as f:
+    f.write("file,class,type,cbo,cboModified,fanin,fanout,wmc,dit,noc,rfc,lcom,lcom*,publicMethodsQty,loc\\n")
+    for i, nome in enumerate(arquivos, 1):
+        f.write(f"{nome},{nome[:-5]},class,{i},0,1,2,{3 * i},1,0,4,{5 * i},0.5,2,10\\n")
+'''
+
+FONTES = {
+    'A.java': 'package p;\n\n/** Classe A. */\npublic class A {\n    // contador\n    int x = 1;\n}\n',
+    'B.java': 'package p;\n\npublic class B extends A {\n    /* bloco\n       de comentário */\n    String s = "// não é comentário";\n}\n',
+    'C.java': 'package p;\n\npublic class C {\n}\n',
+}
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(["git", "-c", "user.name=teste", "-c", "user.email=teste@exemplo.com",
+                           "-c", "init.defaultBranch=main", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _criar_repositorio(host_dir, full_name, fontes):
+    """
+    Cria <host_dir>/<full_name>.git (bare) com um commit contendo fontes; retorna o SHA do HEAD
+    """
+    trabalho = host_dir.parent / "trabalho" / full_name
+    (trabalho / "src").mkdir(parents=True)
+    for nome, conteudo in fontes.items():
+        (trabalho / "src" / nome).write_text(conteudo)
+    _git("init", "-q", cwd=trabalho)
+    _git("add", ".", cwd=trabalho)
+    _git("commit", "-q", "-m", "inicial", cwd=trabalho)
+    _git("clone", "-q", "--bare", str(trabalho), str(host_dir / f"{full_name}.git"))
+    return _git("rev-parse", "HEAD", cwd=trabalho)
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    host_dir = tmp_path / "host"
+    shas = {
+        'org/tres': _criar_repositorio(host_dir, 'org/tres', FONTES),
+        'org/um': _criar_repositorio(host_dir, 'org/um', {'C.java': FONTES['C.java']}),
+    }
+    host = f"file://{host_dir}"
+    repos = [RegistroRepositorio(full_name, None, 10, 1, 10, 'Java', 1, 1420070400, 1704067200,
+                                 age_years=9.0, host=host) for full_name in shas]
+    extrator = tmp_path / "extrator.py"
+    extrator.write_text(EXTRATOR)
+    registro = tmp_path / "execucoes.log"
+
+    def analisador():
+        return AnalisadorQualidadeJava(
+            usar_cache=False, output_dir=str(tmp_path / "resultados"), dataset_dir=str(tmp_path / "dataset"),
+            ck_comando=[sys.executable, str(extrator), "{projeto}", "{saida}", str(registro)],
+            workers_clone=2, workers_ck=2, workers_parse=1,
+        )
+    return analisador, repos, shas, registro
+
+
+def _analisar(analisador, repos):
+    return {linha['full_name']: linha for _, linha in analisador.iterar_analise_ck(repos)}
+
+
+def test_clona_analisa_e_agrega(ambiente):
+    criar, repos, shas, registro = ambiente
+    linhas = _analisar(criar(), repos)
+
+    assert set(linhas) == set(shas)
+    tres = linhas['org/tres']
+    assert tres['clone_url'].endswith("/host/org/tres.git")
+    # Medianas do class.csv do extrator: cbo 1..3, wmc 3..9, lcom 5..15
+    assert (tres['cbo'], tres['wmc'], tres['lcom']) == (2.0, 6.0, 10.0)
+    assert tres['classes'] == 3
+    assert tres['sha'] == shas['org/tres']
+    # LOC e comentários contados no clone (a string com // não conta como comentário)
+    assert (tres['loc'], tres['comments']) == (11, 4)
+    assert (linhas['org/um']['loc'], linhas['org/um']['comments']) == (3, 0)
+    assert len(registro.read_text().splitlines()) == 2
+
+
+def test_reaproveita_repositorios_com_head_inalterado(ambiente):
+    criar, repos, shas, registro = ambiente
+    primeira = _analisar(criar(), repos)
+
+    analisador = criar()
+    assert analisador.armazem_ck.shas() == shas
+    segunda = _analisar(analisador, repos)
+
+    # O HEAD remoto (git ls-remote) não mudou: nada é clonado nem analisado de novo
+    assert len(registro.read_text().splitlines()) == 2
+    medidas = ('sha', 'loc', 'comments', 'classes', 'cbo', 'dit', 'lcom', 'wmc', 'cbo_p90')
+    assert {nome: [linha[chave] for chave in medidas] for nome, linha in segunda.items()} == \
+        {nome: [linha[chave] for chave in medidas] for nome, linha in primeira.items()}
+
+
+def test_falha_na_coleta_chega_ao_consumidor(ambiente):
+    criar, repos, shas, registro = ambiente
+
+    def coleta():
+        yield repos[0]
+        raise ConnectionError("busca indisponível")
+
+    analisados = []
+    with pytest.raises(ConnectionError):
+        for _, linha in criar().iterar_analise_ck(coleta()):
+            analisados.append(linha['full_name'])
+    # O repositório gerado antes da falha ainda é entregue
+    assert analisados == [repos[0]['full_name']]
@@ -0,0 +1,99 @@
+"""
+ControladorRateLimit com respostas simuladas (apenas os cabeçalhos) e vários estudos em threads
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+from analise_completa import ControladorRateLimit
+
+
+def _resposta(restantes, reset_em, status=200, recurso='core'):
+    return SimpleNamespace(status_code=status, headers={
+        'X-RateLimit-Remaining': str(restantes), 'X-RateLimit-Reset': str(reset_em),
+        'X-RateLimit-Resource': recurso,
+    })
+
+
+def _requisitar(controlador, estudo, quantidade, feitas):
+    def executar():
+        for _ in range(quantidade):
+            controlador.aguardar(estudo)
+            feitas.append(estudo)
+    thread = threading.Thread(target=executar, daemon=True)
+    thread.start()
+    return thread
+
+
+def _esperar(condicao, limite=2.0):
+    fim = time.time() + limite
+    while not condicao() and time.time() < fim:
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_estudo_que_comeca_primeiro_usa_so_a_sua_fracao():
+    controlador = ControladorRateLimit()
+    controlador.atualizar(_resposta(20, time.time() + 60))
+    controlador.registrar('a', 'b')
+
+    feitas = []
+    _requisitar(controlador, 'a', 20, feitas)
+    assert not _esperar(lambda: len(feitas) > 10, limite=0.3)
+    assert feitas.count('a') == 10
+
+    # O outro estudo ainda tem a sua metade da janela
+    _requisitar(controlador, 'b', 10, feitas).join(timeout=2)
+    assert feitas.count('b') == 10
+
+    # A janela acabou: o restante de 'a' só sai na próxima, que ele tem só para si após 'b' encerrar
+    controlador.encerrar('b')
+    assert not _esperar(lambda: feitas.count('a') > 10, limite=0.2)
+    controlador.atualizar(_resposta(20, time.time() + 120))
+    assert _esperar(lambda: feitas.count('a') == 20)
+
+
+def test_estudo_sem_cota_nao_bloqueia_os_demais():
+    controlador = ControladorRateLimit()
+    controlador.registrar('a')
+    controlador.atualizar(_resposta(20, time.time() + 60))
+    _requisitar(controlador, 'a', 20, []).join(timeout=2)
+
+    # Nova janela: 'a' já fez 20 requisições no total, mas a divisão é por janela
+    controlador.atualizar(_resposta(20, time.time() + 120))
+    controlador.registrar('b')
+    feitas = []
+    _requisitar(controlador, 'b', 11, feitas)
+    assert _esperar(lambda: feitas.count('b') == 10)
+
+    # 'b' esgotou a sua fração e aguarda a virada da janela; 'a' segue com a sua
+    inicio = time.time()
+    _requisitar(controlador, 'a', 10, feitas).join(timeout=2)
+    assert feitas.count('a') == 10
+    assert time.time() - inicio < 1
+    assert feitas.count('b') == 10
+
+    # A janela virou: 'b' volta a ter cota
+    controlador.atualizar(_resposta(20, time.time() + 180))
+    assert _esperar(lambda: feitas.count('b') == 11)
+    assert controlador.consumo == {'a': 30, 'b': 11}
+
+
+def test_cota_esgotada_de_um_recurso_nao_bloqueia_outro():
+    controlador = ControladorRateLimit()
+    controlador.atualizar(_resposta(0, time.time() + 60, recurso='search'))
+    controlador.atualizar(_resposta(100, time.time() + 60, recurso='graphql'))
+
+    inicio = time.time()
+    controlador.aguardar(recurso='graphql')
+    assert time.time() - inicio < 0.5
+
+
+def test_retry_after_bloqueia_o_recurso():
+    controlador = ControladorRateLimit()
+    resposta = SimpleNamespace(status_code=429, headers={'Retry-After': '0.3'})
+    assert controlador.atualizar(resposta, 'search')
+
+    inicio = time.time()
+    controlador.aguardar(recurso='search')
+    assert time.time() - inicio >= 0.25
@@ -0,0 +1,141 @@
+"""
+Planejamento e coleta em shards contra uma busca simulada com o limite de 1.000 resultados
+"""
+import bisect
+import random
+import re
+from datetime import date, timedelta
+
+import pytest
+
+from analise_completa import INICIO_GITHUB, LIMITE_RESULTADOS_BUSCA
+
+
+def _repo(i, estrelas, criado):
+    return {
+        'full_name': f'org/r{i:05d}', 'description': None, 'stargazers_count': estrelas, 'forks_count': 1,
+        'watchers_count': estrelas, 'language': 'Java', 'size': 100,
+        'created_at': f'{criado.isoformat()}T00:00:00Z', 'updated_at': '2024-12-31T00:00:00Z',
+        'default_branch': 'main', 'clone_url': f'https://github.com/org/r{i:05d}.git',
+    }
+
+
+def _ordenar(repos):
+    return sorted(repos, key=lambda repo: (-repo['stargazers_count'], repo['full_name']))
+
+
+def _corpus(total=20000, empatados=1500, semente=7):
+    """
+    Repositórios com estrelas de cauda longa e empatados repositórios com 3 estrelas,
+    que só se separam por data de criação
+    """
+    rng = random.Random(semente)
+    dias = (date(2024, 12, 31) - INICIO_GITHUB).days
+    return _ordenar(_repo(i, 3 if i >= total - empatados else max(4, int(400000 / (i + 1) ** 1.3)),
+                          INICIO_GITHUB + timedelta(days=rng.randrange(dias)))
+                    for i in range(total))
+
+
+def _corpus_topo_esparso():
+    """
+    Três repositórios muito acima de uma faixa densa, com uma faixa vazia entre eles: a divisão
+    geométrica da faixa do topo deixa um shard por repositório, separados pela faixa descartada
+    """
+    estrelas = [400000, 200000, 60000] + [13000 + i * 7000 // 3000 for i in range(3000)] + \
+        [4 + i * 12000 // 2000 for i in range(2000)]
+    return _ordenar(_repo(i, valor, date(2015, 1, 1)) for i, valor in enumerate(estrelas))
+
+
+class BuscaSimulada:
+    """
+    Responde /search/repositories filtrando o corpus pelos qualificadores stars: e created:,
+    em ordem decrescente de estrelas e com no máximo 1.000 resultados por consulta
+    """
+
+    def __init__(self, corpus):
+        self.carregar(corpus)
+        self.consultas = []
+
+    def carregar(self, corpus):
+        self.corpus = _ordenar(corpus)
+        self._chaves = [-repo['stargazers_count'] for repo in self.corpus]
+
+    def __call__(self, caminho, parametros):
+        consulta = parametros['q']
+        self.consultas.append(consulta)
+        resultados = self.corpus
+        estrelas = re.search(r'stars:(\d+)\.\.(\d+)', consulta)
+        if estrelas:
+            minimo, maximo = int(estrelas[1]), int(estrelas[2])
+            resultados = resultados[bisect.bisect_left(self._chaves, -maximo):
+                                    bisect.bisect_right(self._chaves, -minimo)]
+        criacao = re.search(r'created:(\S+)\.\.(\S+)', consulta)
+        if criacao:
+            resultados = [repo for repo in resultados if criacao[1] <= repo['created_at'][:10] <= criacao[2]]
+        per_page, page = int(parametros.get('per_page', 30)), int(parametros.get('page', 1))
+        if page * per_page > LIMITE_RESULTADOS_BUSCA:
+            return 422, {}, {'message': 'Only the first 1000 search results are available'}
+        itens = resultados[(page - 1) * per_page:page * per_page]
+        return 200, {}, {'total_count': len(resultados), 'items': itens}
+
+
+@pytest.fixture
+def busca(stub):
+    simulada = BuscaSimulada(_corpus())
+    stub.responder = simulada
+    return simulada
+
+
+def _contagens(busca):
+    return [consulta for consulta in busca.consultas if 'stars:' in consulta]
+
+
+def test_planejamento_para_em_max_repos(busca, analisador):
+    shards = analisador(usar_cache=False).planejar_shards(max_repos=3000)
+
+    totais = [total for _, total in shards]
+    assert sum(totais[:-1]) < 3000 <= sum(totais)
+    assert all(0 < total <= LIMITE_RESULTADOS_BUSCA for total in totais)
+    # Em ordem decrescente de estrelas e sem contar as faixas de poucas estrelas
+    assert all(anterior[0] > shard[1] for (anterior, _), (shard, _) in zip(shards, shards[1:]))
+    assert not any(consulta.endswith('stars:0..3') or 'stars:3..3' in consulta for consulta in busca.consultas)
+
+
+def test_faixas_esparsas_do_topo_sao_fundidas(busca, analisador):
+    busca.carregar(_corpus_topo_esparso())
+    shards = analisador(usar_cache=False).planejar_shards(max_repos=500)
+
+    # Os shards do topo, separados por uma faixa sem repositórios, viram um único shard
+    topo, total = shards[0]
+    assert topo[1] == 400000
+    assert total > 3
+    assert sum(total for _, total in shards) >= 500
+
+
+def test_faixa_de_um_unico_valor_e_dividida_por_data(busca, analisador):
+    shards = analisador(usar_cache=False).planejar_shards()
+
+    por_data = [shard for shard, _ in shards if shard[2] is not None]
+    # Só faixas de um único valor de estrelas são divididas por data, inclusive a dos empatados
+    assert all(shard[0] == shard[1] for shard in por_data)
+    assert any(shard[:2] == (3, 3) for shard in por_data)
+    assert sum(total for _, total in shards) == len(busca.corpus)
+
+
+def test_coleta_em_ordem_decrescente_sem_duplicatas(busca, analisador):
+    # Um repositório que ganhou estrelas entre as consultas aparece em dois shards
+    movido = dict(busca.corpus[-1], stargazers_count=5)
+    busca.carregar(busca.corpus + [movido])
+
+    repos = list(analisador(usar_cache=False).iterar_repositorios_sharded())
+
+    nomes = [repo['full_name'] for repo in repos]
+    assert len(nomes) == len(set(nomes)) == len(busca.corpus) - 1
+    estrelas = [repo['stars'] for repo in repos]
+    assert estrelas == sorted(estrelas, reverse=True)
+
+
+def test_coleta_limitada_traz_os_mais_populares(busca, analisador):
+    repos = list(analisador(usar_cache=False).iterar_repositorios_sharded(max_repos=2500))
+
+    assert [repo['full_name'] for repo in repos] == [repo['full_name'] for repo in busca.corpus[:2500]]